@@ -0,0 +1,232 @@
+"""
+Headless benchmarks for the calculation and reporting hot paths in einboard_core:
+scalar and batch emission calculation, the upload loop (CSV parse, factors,
+row keys, SQLite + cube writes), the energy conversion and the GHG / energy
+dashboard summaries. Synthetic entries span all three scopes and the 15
+Scope 3 categories.
+
+Streamlit isn't imported. Each size runs in its own process against a
+throwaway database, so stores, caches and peak memory don't leak between
+sizes. Peak memory is the stage's high-water resident set size above what the
+process held when the stage started, sampled from /proc (Linux); tracemalloc
+isn't used because it slows the pure-Python stages several-fold.
+
+    python benchmarks/bench_pipeline.py                      # 1k, 100k and 1M rows, checked against baseline.json
+    python benchmarks/bench_pipeline.py --sizes 1000 100000 --tolerance 0.3
+    python benchmarks/bench_pipeline.py --update-baseline    # record this machine's numbers
+
+Exits with status 1 when a stage is slower or uses more memory than its
+baseline by more than --tolerance. Baselines are machine specific; refresh
+them with --update-baseline after an intended change or on new hardware.
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+# stages below these are too noisy to compare against the baseline
+MIN_SECONDS = 0.25
+MIN_PEAK_MB = 16.0
+
+def synthetic_entries(rows, scope_activities, units, seed=0):
+    """Upload-shaped entries drawn uniformly from every (scope, activity, sub-activity, specific item) the UI offers."""
+    import numpy as np
+    import pandas as pd
+
+    catalogue = []
+    for scope, activities in scope_activities.items():
+        for activity, subs in activities.items():
+            for sub, detail in subs.items():
+                for specific in (detail if isinstance(detail, list) else [""]):
+                    catalogue.append((scope, activity, sub, specific, units.get(sub, "kg")))
+    rng = np.random.default_rng(seed)
+    pick = rng.integers(0, len(catalogue), rows)
+    columns = list(zip(*catalogue))
+    months = ["Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec","Jan","Feb","Mar"]
+    return pd.DataFrame({
+        "Scope": np.array(columns[0], dtype=object)[pick],
+        "Activity": np.array(columns[1], dtype=object)[pick],
+        "Sub-Activity": np.array(columns[2], dtype=object)[pick],
+        "Specific Item": np.array(columns[3], dtype=object)[pick],
+        "Quantity": np.round(rng.random(rows) * 1000, 2),
+        "Unit": np.array(columns[4], dtype=object)[pick],
+        "Month": np.array(months, dtype=object)[rng.integers(0, 12, rows)],
+        "FY": rng.choice([2023, 2024], rows),
+        "Entity": rng.choice(["Acme", "Beta"], rows),
+        "Site": rng.choice([f"Plant {i}" for i in range(10)], rows),
+    })
+
+class _Upload(io.BytesIO):
+    """In-memory stand-in for Streamlit's UploadedFile."""
+    def __init__(self, raw, name):
+        super().__init__(raw)
+        self.name = name
+        self.size = len(raw)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+def _rss():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return None
+
+def _measure(fn, interval=0.005):
+    """(seconds, peak MB above the starting RSS) of fn(); the MB is None where /proc isn't available."""
+    start_rss = _rss()
+    peak = [start_rss]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], _rss())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    if start_rss is not None:
+        sampler.start()
+    started = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - started
+    done.set()
+    if start_rss is None:
+        return seconds, None
+    sampler.join()
+    return seconds, (max(peak[0], _rss()) - start_rss) / 1e6
+
+def run_size(rows):
+    """Time every stage on `rows` synthetic entries in this process; returns {stage: {rows, seconds, rows_per_s, peak_mb}}."""
+    sys.path.insert(0, ROOT)
+    from einboard_core.catalog import scope_activities, units_dict
+    from einboard_core.energy import convert_scope12_energy, energy_overview
+    from einboard_core.engine import calculate_emissions, calculate_emissions_batch, enrich_entries
+    from einboard_core.ingest import read_upload_chunks, row_keys
+    from einboard_core.reports import ghg_summaries
+    from einboard_core.storage import ROW_KEY_COLUMN, TableStore
+
+    df = synthetic_entries(rows, scope_activities, units_dict)
+    raw = df.to_csv(index=False).encode()
+    results = {}
+
+    def scalar():
+        for r in df[["Scope","Activity","Sub-Activity","Specific Item","Quantity","Unit"]].itertuples(index=False):
+            calculate_emissions(*r)
+
+    def upload():
+        # the dashboard's upload loop (einboard.ingest_upload) without the progress bar
+        occurrences, new = {}, 0
+        for chunk in read_upload_chunks(io.BytesIO(raw), "bench.csv"):
+            enrich_entries(chunk)
+            chunk[ROW_KEY_COLUMN] = row_keys(chunk, occurrences)
+            new += store.append("entries", chunk)
+        assert new == rows, new
+
+    def energy_conversion():
+        # full-table read + vectorized kWh conversion (convert_scope12_energy), the work energy_overview's cube replaces
+        frame = store.read("entries", ["Scope","Sub-Activity","Specific Item","Quantity","Unit","Month","Emissions_kgCO2e"])
+        convert_scope12_energy(frame).groupby("Type")["Energy_kWh"].sum()
+
+    stages = [
+        ("calculate_emissions", scalar),
+        ("calculate_emissions_batch", lambda: calculate_emissions_batch(df, return_rules=True)),
+        ("upload", upload),
+        ("energy_conversion", energy_conversion),
+        ("energy_overview", lambda: energy_overview(store)),
+        ("ghg_summaries", lambda: ghg_summaries(store)),
+    ]
+    # the stages share one store, removed with its WAL / SHM files when the run ends
+    with tempfile.TemporaryDirectory(prefix="einboard-bench-") as tmp:
+        store = TableStore(os.path.join(tmp, "bench.sqlite"))
+        try:
+            for stage, fn in stages:
+                seconds, peak_mb = _measure(fn)
+                results[stage] = {"rows": rows, "seconds": round(seconds, 4), "rows_per_s": round(rows / seconds),
+                                  "peak_mb": None if peak_mb is None else round(peak_mb, 2)}
+        finally:
+            store.close()
+    return results
+
+def _child(rows):
+    """Run one size in a fresh interpreter and return its results."""
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(rows)],
+                          capture_output=True, text=True)
+    if proc.returncode:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(f"benchmark for {rows:,} rows failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def regressions(results, baseline, tolerance):
+    """Messages for stages slower / hungrier than baseline * (1 + tolerance)."""
+    found = []
+    for size, stages in results.items():
+        for stage, now in stages.items():
+            base = baseline.get(size, {}).get(stage)
+            if base is None:
+                continue
+            if max(now["seconds"], base["seconds"]) >= MIN_SECONDS and now["seconds"] > base["seconds"] * (1 + tolerance):
+                found.append(f"{stage} @ {int(size):,} rows: {now['seconds']:.3f}s vs baseline {base['seconds']:.3f}s")
+            if now["peak_mb"] is None or base["peak_mb"] is None:
+                continue
+            if max(now["peak_mb"], base["peak_mb"]) >= MIN_PEAK_MB and now["peak_mb"] > base["peak_mb"] * (1 + tolerance):
+                found.append(f"{stage} @ {int(size):,} rows: {now['peak_mb']:.1f} MB vs baseline {base['peak_mb']:.1f} MB")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slow-down / memory growth over the baseline (0.5 = +50%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="write this run's numbers to --baseline instead of checking")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_size(args.child)))
+        return
+
+    results = {}
+    for rows in args.sizes:
+        results[str(rows)] = stages = _child(rows)
+        print(f"\n{rows:,} rows")
+        print(f"  {'stage':<27} {'seconds':>9} {'rows/s':>13} {'peak MB':>9}")
+        for stage, r in stages.items():
+            peak = "n/a" if r["peak_mb"] is None else f"{r['peak_mb']:.1f}"
+            print(f"  {stage:<27} {r['seconds']:>9.3f} {r['rows_per_s']:>13,} {peak:>9}")
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as fh:
+                baseline = json.load(fh)
+        baseline.update(results)
+        with open(args.baseline, "w") as fh:
+            json.dump(baseline, fh, indent=2)
+            fh.write("\n")
+        print(f"\nbaseline written to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("\nno baseline to check against; run with --update-baseline to record one")
+        return
+    with open(args.baseline) as fh:
+        found = regressions(results, json.load(fh), args.tolerance)
+    if found:
+        print(f"\nregressions (tolerance {args.tolerance:.0%}):")
+        for line in found:
+            print("  " + line)
+        sys.exit(1)
+    print(f"\nno regressions against {os.path.relpath(args.baseline)} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
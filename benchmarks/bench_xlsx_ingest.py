@@ -0,0 +1,74 @@
+"""
+Compare XLSX upload readers: pd.read_excel (the previous upload path) vs the
+streaming read-only reader in ingest.py.
+
+    python benchmarks/bench_xlsx_ingest.py --rows 300000 --sheets 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from openpyxl import Workbook
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from einboard_core.ingest import ALL_SHEETS, read_upload_chunks  # noqa: E402
+
+HEADER = ["Scope", "Activity", "Sub-Activity", "Specific Item", "Quantity", "Unit",
+          "Supplier", "Invoice No", "Cost Centre", "Remarks"]
+
+def make_workbook(path, rows, sheets, seed=0):
+    """
+    Supplier-style workbook: the upload columns plus unused ones, split across sheets.
+    Built in normal (not write-only) mode so strings are shared and the sheet dimension is set, as in Excel's own files.
+    """
+    rng = np.random.default_rng(seed)
+    wb = Workbook()
+    wb.remove(wb.active)
+    per_sheet = rows // sheets
+    subs = ["Diesel Generator", "Grid Electricity", "Air Travel", "Landfill", "Petrol Car"]
+    for s in range(sheets):
+        ws = wb.create_sheet(f"Supplier {s + 1}")
+        ws.append(HEADER)
+        qty = rng.random(per_sheet) * 1000
+        pick = rng.integers(0, len(subs), per_sheet)
+        for i in range(per_sheet):
+            ws.append(["Scope 1", "Stationary Combustion", subs[pick[i]], "", float(qty[i]), "Liters",
+                       f"Supplier {s}", f"INV-{i}", "CC-01", "monthly extract"])
+    wb.save(path)
+
+def bench(label, fn):
+    start = time.perf_counter()
+    rows = fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<34} {rows:>10,} rows  {seconds:8.2f}s  {rows / seconds:>12,.0f} rows/s")
+    return seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--sheets", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "suppliers.xlsx")
+        make_workbook(path, args.rows, args.sheets)
+        print(f"workbook: {args.rows:,} rows over {args.sheets} sheet(s), {os.path.getsize(path) / 1e6:.1f} MB")
+
+        def read_excel_all():
+            frames = pd.read_excel(path, sheet_name=None)
+            return sum(len(df.fillna("")) for df in frames.values())
+
+        def stream_all():
+            with open(path, "rb") as fh:
+                return sum(len(chunk) for chunk in read_upload_chunks(fh, path, sheet=ALL_SHEETS))
+
+        slow = bench("pd.read_excel (all sheets)", read_excel_all)
+        fast = bench("streaming read-only (all sheets)", stream_all)
+        print(f"speed-up: {slow / fast:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Computation core of the EinTrust dashboard, importable without Streamlit.
+
+    catalog         scopes, activities, units and FY months offered for entry
+    factors         emission factors (built-in defaults + emission_factors.csv)
+    factor_library  the emission_factors.csv reader
+    engine          factor resolution and emission calculation (scalar and batch)
+    energy          Scope 1/2 energy conversion and the energy overview
+    reports         BRSR / CDP / GRI / TCFD KPI maps and GHG summaries
+    scenarios       decarbonization levers, parameter sweeps and MACC curves
+    uncertainty     Monte Carlo confidence intervals of the GHG totals
+    timeseries      monthly / quarterly / annual series, YoY, rolling 12 months, intensity
+    storage         SQLite table store with per-table aggregate cubes
+    ingest          streaming CSV / XLS / XLSX upload reader
+    bills           PDF utility-bill extraction
+    exports         versioned CSV / Parquet table exports
+    batch           command-line batch calculator (python -m einboard_core.batch)
+    profiling       opt-in per-rerun timing spans and cProfile capture
+
+Submodules are imported explicitly (e.g. `from einboard_core.engine import
+calculate_emissions`); importing the package itself loads nothing, so process
+pool workers that only need bills.py stay light.
+"""
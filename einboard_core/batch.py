@@ -0,0 +1,144 @@
+"""
+Batch emission calculator for directories of activity files (e.g. nightly ERP extracts).
+
+    python -m einboard_core.batch extracts/ --out enriched/ --format parquet
+
+Every CSV / XLS / XLSX file in the directory is streamed in chunks through the
+same factor rules as the dashboard upload (engine.enrich_entries) and written
+to the output directory as <file name>.<format> with Emissions_kgCO2e and
+Factor_Rule added. Files are spread over a process pool, largest first, one
+file per task. missing_factors.csv lists, per file, the (scope, activity,
+sub-activity, specific item, unit) combinations that had no factor.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .engine import enrich_entries
+from .exports import EXPORT_FORMATS, pq, write_chunks
+from .ingest import ALL_SHEETS, DEFAULT_CHUNKSIZE, UPLOAD_COLUMNS, read_upload_chunks
+from .storage import TABLE_SCHEMAS
+
+INPUT_EXTENSIONS = (".csv", ".xlsx", ".xls")
+OUTPUT_COLUMNS = UPLOAD_COLUMNS + ["Emissions_kgCO2e", "Factor_Rule"]
+OUTPUT_SCHEMA = {c: TABLE_SCHEMAS["entries"][c] for c in OUTPUT_COLUMNS}
+MISSING_KEY_COLUMNS = ["Scope", "Activity", "Sub-Activity", "Specific Item", "Unit"]
+MISSING_REPORT = "missing_factors.csv"
+# --format value -> EXPORT_FORMATS label
+FORMATS = {"csv": "CSV", "csv.gz": "CSV (gzip)", "parquet": "Parquet"}
+
+# missing is a DataFrame of MISSING_KEY_COLUMNS + Rows + Quantity; unparsed_months is {Month value: rows};
+# error is None on success
+FileResult = namedtuple("FileResult", ["name", "rows", "missing_rows", "output", "missing", "seconds", "error", "unparsed_months"])
+
+def find_inputs(directory, recursive=False):
+    """Activity files under directory, as paths relative to it (sorted)."""
+    found = []
+    for root, dirs, files in os.walk(directory):
+        found += [os.path.relpath(os.path.join(root, f), directory) for f in files if f.lower().endswith(INPUT_EXTENSIONS)]
+        if not recursive:
+            break
+    return sorted(found)
+
+def output_path(out_dir, name, fmt):
+    ext, _ = EXPORT_FORMATS[fmt]
+    return os.path.join(out_dir, f"{name}.{ext}")
+
+def process_file(in_dir, name, out_dir, fmt, chunksize=DEFAULT_CHUNKSIZE, sheet=None):
+    """Process-pool worker: enrich one file and write it; never raises, failures come back in FileResult.error."""
+    started = time.perf_counter()
+    counts = {"rows": 0, "missing": 0}
+    missing_parts = []
+    unparsed = {}
+
+    def enriched(fh):
+        for chunk in read_upload_chunks(fh, name, chunksize, sheet=sheet, unparsed=unparsed):
+            missing = enrich_entries(chunk)
+            counts["rows"] += len(chunk)
+            counts["missing"] += int(missing.sum())
+            if missing.any():
+                missing_parts.append(chunk[missing].groupby(MISSING_KEY_COLUMNS, dropna=False)["Quantity"].agg(["size", "sum"]))
+            yield chunk[OUTPUT_COLUMNS]
+
+    path = output_path(out_dir, name, fmt)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(os.path.join(in_dir, name), "rb") as fh:
+            write_chunks(enriched(fh), path, fmt, OUTPUT_SCHEMA)
+    except Exception as e:
+        return FileResult(name, counts["rows"], counts["missing"], None, None, time.perf_counter() - started,
+                          str(e) or type(e).__name__, unparsed)
+    missing = pd.DataFrame(columns=MISSING_KEY_COLUMNS + ["Rows", "Quantity"])
+    if missing_parts:
+        missing = (pd.concat(missing_parts).groupby(level=list(range(len(MISSING_KEY_COLUMNS))), dropna=False).sum()
+                   .rename(columns={"size": "Rows", "sum": "Quantity"}).reset_index())
+    return FileResult(name, counts["rows"], counts["missing"], path, missing, time.perf_counter() - started, None, unparsed)
+
+def run_batch(in_dir, names, out_dir, fmt, workers=None, chunksize=DEFAULT_CHUNKSIZE, sheet=None):
+    """Yield a FileResult per file as files finish; the largest files are submitted first so the pool stays busy."""
+    names = sorted(names, key=lambda n: os.path.getsize(os.path.join(in_dir, n)), reverse=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(process_file, in_dir, name, out_dir, fmt, chunksize, sheet) for name in names]
+        for future in as_completed(futures):
+            yield future.result()
+
+def write_missing_report(results, path):
+    """missing_factors.csv: one row per file and factor-less combination, most rows first."""
+    frames = [r.missing.assign(File=r.name) for r in results if r.missing is not None and len(r.missing)]
+    columns = ["File"] + MISSING_KEY_COLUMNS + ["Rows", "Quantity"]
+    report = pd.concat(frames, ignore_index=True)[columns] if frames else pd.DataFrame(columns=columns)
+    report.sort_values(["Rows", "File"], ascending=[False, True]).to_csv(path, index=False)
+    return len(report)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m einboard_core.batch", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input_dir", help="directory of CSV / XLS / XLSX activity files")
+    parser.add_argument("-o", "--out", required=True, help="output directory (created if missing)")
+    parser.add_argument("-f", "--format", choices=list(FORMATS), default="parquet" if pq is not None else "csv")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="include sub-directories (mirrored under --out)")
+    parser.add_argument("--all-sheets", action="store_true", help="read every workbook sheet with the upload columns, not just the first")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    fmt = FORMATS[args.format]
+    if fmt == "Parquet" and pq is None:
+        parser.error("--format parquet needs the pyarrow package (pip install pyarrow)")
+    names = find_inputs(args.input_dir, args.recursive)
+    if not names:
+        parser.error(f"no {'/'.join(INPUT_EXTENSIONS)} files in {args.input_dir}")
+    os.makedirs(args.out, exist_ok=True)
+
+    started = time.perf_counter()
+    results = []
+    for result in run_batch(args.input_dir, names, args.out, fmt, args.workers, args.chunksize,
+                            ALL_SHEETS if args.all_sheets else None):
+        results.append(result)
+        if result.error:
+            print(f"FAILED  {result.name}: {result.error}", file=sys.stderr)
+        else:
+            print(f"ok      {result.name}: {result.rows:,} rows, {result.missing_rows:,} without a factor, {result.seconds:.1f}s")
+            if result.unparsed_months:
+                print(f"warning {result.name}: {sum(result.unparsed_months.values()):,} rows with an unreadable Month (e.g. "
+                      + ", ".join(repr(v) for v in list(result.unparsed_months)[:3]) + "), written without one", file=sys.stderr)
+    seconds = time.perf_counter() - started
+
+    report = os.path.join(args.out, MISSING_REPORT)
+    combos = write_missing_report(results, report)
+    rows = sum(r.rows for r in results if not r.error)
+    missing = sum(r.missing_rows for r in results if not r.error)
+    failed = [r for r in results if r.error]
+    print(f"\n{len(results) - len(failed)}/{len(results)} files, {rows:,} rows in {seconds:.1f}s "
+          f"({rows / max(seconds, 1e-9) * 3600:,.0f} rows/hour); {missing:,} rows without a factor "
+          f"({combos:,} combinations, see {report})")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+PDF utility-bill extraction for electricity and fuel invoices.
+
+Text is pulled from each PDF with pypdf (optional dependency) and scanned for
+the consumption (kWh or litres) and bill-date fields. extract_bills() fans the
+files out over a process pool so parsing doesn't block the Streamlit thread,
+and keeps results by file hash, so re-uploading an invoice costs nothing.
+"""
+import hashlib
+import io
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import as_completed
+from datetime import date
+
+from .catalog import fiscal_year
+
+try:
+    from pypdf import PdfReader
+except ImportError:     # PDF upload is optional; everything else works without it
+    PdfReader = None
+
+# kwh/litres are None when the field wasn't found; month is the FY month label ("Apr".."Mar")
+BillExtract = namedtuple("BillExtract", ["file_hash", "kwh", "litres", "fuel", "bill_date", "month", "error"])
+
+_MONTH_LABELS = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"]
+_MONTH_NUMBERS = {m.lower(): i + 1 for i, m in enumerate(_MONTH_LABELS)}
+
+_NUMBER = r"(\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+_KWH_RE = re.compile(_NUMBER + r"\s*(?:kwh|units)\b", re.I)
+# "Units Consumed: 450" style, with the unit in the label
+_KWH_LABEL_RE = re.compile(r"(?:units consumed|billed units|net units|total units|kwh consumed)\s*(?:\(kwh\))?\s*[:\-]?\s*" + _NUMBER, re.I)
+_LITRE_RE = re.compile(_NUMBER + r"\s*(?:l|ltrs?|litres?|liters?)\b", re.I)
+# lines carrying the billed quantity, as opposed to meter readings or rates
+_TOTAL_HINTS = re.compile(r"units consumed|billed units|net units|total (?:units|consumption|quantity|qty)|consumption|quantity|qty", re.I)
+_FUEL_NAMES = [("Diesel", re.compile(r"\b(?:diesel|hsd)\b", re.I)),
+               ("Petrol", re.compile(r"\b(?:petrol|motor spirit)\b", re.I)),
+               ("LPG", re.compile(r"\blpg\b", re.I))]
+
+_DATE_LABEL = r"(?:bill|invoice|billing)\s*date\s*[:\-]?\s*"
+_DATE_FORMS = [
+    # (pattern, group order) - Indian bills are day-first
+    (r"(\d{4})-(\d{1,2})-(\d{1,2})", "ymd"),
+    (r"(\d{1,2})[/\-.](\d{1,2})[/\-.](\d{4})", "dmy"),
+    (r"(\d{1,2})[\s\-]([A-Za-z]{3})[a-z]*[\s\-,]+(\d{4})", "dby"),
+]
+
+def _to_number(text):
+    return float(text.replace(",", ""))
+
+def _quantity(text, pattern):
+    """Billed quantity: the first match on a 'total/consumption' line, else the only match, else the first."""
+    found = []
+    for line in text.splitlines():
+        for m in pattern.finditer(line):
+            found.append((bool(_TOTAL_HINTS.search(line)), _to_number(m.group(1))))
+    if not found:
+        return None
+    hinted = [q for hint, q in found if hint]
+    return hinted[0] if hinted else found[0][1]
+
+def _parse_date(match, order):
+    a, b, c = match.groups()
+    try:
+        if order == "ymd":
+            return date(int(a), int(b), int(c))
+        if order == "dmy":
+            return date(int(c), int(b), int(a))
+        month = _MONTH_NUMBERS.get(b.lower())
+        return date(int(c), month, int(a)) if month else None
+    except ValueError:
+        return None
+
+def _bill_date(text):
+    # a labelled bill/invoice date wins over any other date on the page
+    for label in (_DATE_LABEL, ""):
+        for pattern, order in _DATE_FORMS:
+            for m in re.finditer(label + pattern, text, re.I):
+                parsed = _parse_date(m, order)
+                if parsed:
+                    return parsed
+    return None
+
+def parse_bill_text(text, file_hash=""):
+    """Pull kWh / litres / fuel / bill date out of a bill's text."""
+    labelled = _KWH_LABEL_RE.search(text)
+    kwh = _to_number(labelled.group(1)) if labelled else _quantity(text, _KWH_RE)
+    litres = _quantity(text, _LITRE_RE)
+    fuel = next((name for name, pattern in _FUEL_NAMES if pattern.search(text)), None)
+    billed = _bill_date(text)
+    return BillExtract(
+        file_hash=file_hash, kwh=kwh, litres=litres, fuel=fuel,
+        bill_date=billed.isoformat() if billed else None,
+        month=_MONTH_LABELS[billed.month - 1] if billed else None,
+        error=None if kwh is not None or litres is not None else "no kWh or litre quantity found",
+    )
+
+def extract_pdf_text(raw):
+    if PdfReader is None:
+        raise RuntimeError("PDF bills need the pypdf package (pip install pypdf).")
+    reader = PdfReader(io.BytesIO(raw))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+def extract_bill(raw, file_hash=""):
+    """Process-pool worker: never raises, failures come back in BillExtract.error."""
+    try:
+        return parse_bill_text(extract_pdf_text(raw), file_hash)
+    except Exception as e:
+        return BillExtract(file_hash, None, None, None, None, None, str(e) or type(e).__name__)
+
+_cache = {}     # sha256 -> BillExtract (successful extractions only)
+_cache_lock = threading.Lock()
+
+def file_hash(raw):
+    return hashlib.sha256(raw).hexdigest()
+
+def extract_bills(files, executor):
+    """
+    Yield (name, BillExtract) for each (name, raw bytes) in files as results arrive.
+    Cached hashes are answered immediately; the rest are parsed on executor.
+    """
+    futures = {}
+    for name, raw in files:
+        digest = file_hash(raw)
+        with _cache_lock:
+            cached = _cache.get(digest)
+        if cached is not None:
+            yield name, cached
+        else:
+            futures[executor.submit(extract_bill, raw, digest)] = name
+    for future in as_completed(futures):
+        result = future.result()
+        if result.error is None:
+            with _cache_lock:
+                _cache[result.file_hash] = result
+        yield futures[future], result
+
+# (scope, activity, sub-activity, unit) an extracted quantity is booked under
+ELECTRICITY_ENTRY = ("Scope 2", "Electricity Consumption", "Grid Electricity", "kWh")
+FUEL_ENTRIES = {
+    "Diesel": ("Scope 1", "Stationary Combustion", "Diesel Generator", "Liters"),
+    "Petrol": ("Scope 1", "Stationary Combustion", "Petrol Generator", "Liters"),
+    "LPG": ("Scope 1", "Stationary Combustion", "LPG Boiler", "Liters"),
+}
+
+def bill_rows(extract):
+    """
+    Entries rows (without emissions) for one extracted bill; litres of an unrecognised fuel are left out.
+    FY is the bill date's fiscal year, or None without a date (the caller's default applies).
+    """
+    fy = fiscal_year(date.fromisoformat(extract.bill_date)) if extract.bill_date else None
+    rows = []
+    booked = [(extract.kwh, ELECTRICITY_ENTRY)]
+    if extract.fuel in FUEL_ENTRIES:
+        booked.append((extract.litres, FUEL_ENTRIES[extract.fuel]))
+    for quantity, (scope, activity, sub_activity, unit) in booked:
+        if quantity is not None:
+            rows.append({
+                "Scope": scope, "Activity": activity, "Sub-Activity": sub_activity, "Specific Item": "",
+                "Quantity": quantity, "Unit": unit, "Month": extract.month, "FY": fy,
+            })
+    return rows
@@ -0,0 +1,172 @@
+"""
+Activity catalogue: the GHG scopes, activities and sub-activities offered for
+data entry (all 15 Scope 3 categories), their default units, the FY months
+(with fiscal_year() mapping a date to its FY) and the 17 SDGs.
+"""
+import datetime
+
+scope_activities = {
+    "Scope 1": {
+        "Stationary Combustion": {
+            "Diesel Generator": "Generator running on diesel for electricity",
+            "Petrol Generator": "Generator running on petrol for electricity",
+            "LPG Boiler": "Boiler or stove using LPG",
+            "Coal Boiler": "Boiler/furnace burning coal",
+            "Biomass Furnace": "Furnace burning wood/agricultural residue"
+        },
+        "Mobile Combustion": {
+            "Diesel Vehicle": "Truck/van running on diesel",
+            "Petrol Car": "Car/van running on petrol",
+            "CNG Vehicle": "Bus or delivery vehicle running on CNG",
+            "Diesel Forklift": "Forklift running on diesel",
+            "Petrol Two-Wheeler": "Scooter or bike running on petrol"
+        },
+        "Process Emissions": {
+            "Cement Production": "CO₂ from cement making",
+            "Steel Production": "CO₂ from steel processing",
+            "Brick Kiln": "CO₂ from brick firing",
+            "Textile Processing": "Emissions from dyeing/fabric processing",
+            "Chemical Manufacturing": "Emissions from chemical reactions",
+            "Food Processing": "Emissions from cooking/heating"
+        },
+        "Fugitive Emissions": {
+            "Refrigerant (HFC/HCFC)": "Gas leak from AC/refrigerator",
+            "Methane (CH₄)": "Methane leaks from storage/pipelines",
+            "SF₆": "Gas leak from electrical equipment"
+        }
+    },
+    "Scope 2": {
+        "Electricity Consumption": {
+            "Grid Electricity": "Electricity bought from grid",
+            "Diesel Generator Electricity": "Electricity generated on-site with diesel"
+        },
+        "Steam / Heat": {"Purchased Steam": "Steam bought from external supplier"},
+        "Cooling / Chilled Water": {"Purchased Cooling": "Cooling bought from supplier"}
+    },
+    # Full set of GHG Protocol Scope 3 categories (15)
+    "Scope 3": {
+        "1 Purchased goods & services": {
+            "Raw Materials": ["Cement","Steel","Chemicals","Textile","Paper"],
+            "Packaging": ["Cardboard","Plastics","Glass"],
+            "Office Supplies": ["Paper","Ink","Stationery"]
+        },
+        "2 Capital goods": {
+            "Machinery & Equipment": None,
+            "Buildings & Infrastructure": None
+        },
+        "3 Fuel- and energy-related activities (not included in Scope 1 or 2)": {
+            "T&D Losses": None,
+            "Fuel Production": None
+        },
+        "4 Upstream transportation & distribution": {
+            "Incoming Transport": None,
+            "Third-party Logistics": None
+        },
+        "5 Waste generated in operations": {
+            "Landfill": None,
+            "Recycling": None,
+            "Composting": None
+        },
+        "6 Business travel": {
+            "Air Travel": None,
+            "Train Travel": None,
+            "Taxi/Car Rental": None
+        },
+        "7 Employee commuting": {
+            "Two-Wheelers": None,
+            "Cars/Vans": None,
+            "Public Transport": None
+        },
+        "8 Upstream leased assets": {
+            "Leased Offices": None,
+            "Leased Warehouses": None
+        },
+        "9 Downstream transportation & distribution": {
+            "Distribution to Customers": None,
+            "Retail/Distributor Transport": None
+        },
+        "10 Processing of sold products": {
+            "Product Assembly": None
+        },
+        "11 Use of sold products": {
+            "Product Use (Energy)": None
+        },
+        "12 End-of-life treatment of sold products": {
+            "Recycling": None,
+            "Landfill": None
+        },
+        "13 Downstream leased assets": {
+            "Leased Operations": None
+        },
+        "14 Franchises": {
+            "Franchise Operations": None
+        },
+        "15 Investments": {
+            "Investments (Financial)": None
+        }
+    }
+}
+
+# units used for auto-filling unit dropdowns
+units_dict = {
+    # Scope1 & 2 common
+    "Diesel Generator": "Liters",
+    "Petrol Generator": "Liters",
+    "LPG Boiler": "Liters",
+    "Coal Boiler": "kg",
+    "Biomass Furnace": "kg",
+    "Diesel Vehicle": "Liters",
+    "Petrol Car": "Liters",
+    "CNG Vehicle": "m³",
+    "Diesel Forklift": "Liters",
+    "Petrol Two-Wheeler": "Liters",
+    "Cement Production": "Tonnes",
+    "Steel Production": "Tonnes",
+    "Brick Kiln": "Tonnes",
+    "Textile Processing": "Tonnes",
+    "Chemical Manufacturing": "Tonnes",
+    "Food Processing": "Tonnes",
+    "Refrigerant (HFC/HCFC)": "kg",
+    "Methane (CH₄)": "kg",
+    "SF₆": "kg",
+    "Grid Electricity": "kWh",
+    "Diesel Generator Electricity": "kWh",
+    "Purchased Steam": "Tonnes",
+    "Purchased Cooling": "kWh",
+    # Scope 3 examples
+    "Cement": "Tonnes",
+    "Steel": "Tonnes",
+    "Chemicals": "Tonnes",
+    "Textile": "Tonnes",
+    "Cardboard": "kg",
+    "Plastics": "kg",
+    "Glass": "kg",
+    "Paper": "kg",
+    "Incoming Transport": "km traveled",
+    "Third-party Logistics": "km traveled",
+    "Air Travel": "Number of flights",
+    "Train Travel": "km traveled",
+    "Taxi/Car Rental": "km traveled",
+    "Two-Wheelers": "km traveled",
+    "Cars/Vans": "km traveled",
+    "Public Transport": "km traveled",
+    "Landfill": "kg",
+    "Recycling": "kg",
+    "Composting": "kg",
+    "Product Use (Energy)": "kWh"
+}
+
+months = ["Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec","Jan","Feb","Mar"]
+
+def fiscal_year(day=None):
+    """FY start year of a date for Apr-Mar years: 15 Jan 2025 -> 2024, i.e. FY2024-25."""
+    day = day or datetime.date.today()
+    return day.year if day.month >= 4 else day.year - 1
+
+# UN Sustainable Development Goals, in goal order
+SDG_LIST = [
+    "No Poverty","Zero Hunger","Good Health & Wellbeing","Quality Education","Gender Equality",
+    "Clean Water & Sanitation","Affordable & Clean Energy","Decent Work & Economic Growth","Industry, Innovation & Infrastructure",
+    "Reduced Inequalities","Sustainable Cities & Communities","Responsible Consumption & Production","Climate Action","Life Below Water",
+    "Life on Land","Peace, Justice & Strong Institutions","Partnerships for the Goals"
+]
@@ -0,0 +1,173 @@
+"""
+Emission engine: resolves a factor for each (scope, sub-activity, specific item,
+unit) with the ordered rules below and computes kg CO2e, one entry at a time
+or vectorized over a DataFrame of uploaded rows.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .catalog import scope_activities, units_dict
+from .factors import emission_factors, factor_library
+from .profiling import timed
+
+# Ordered rules used by calculate_emissions; the first matching rule wins.
+_SCOPE12 = ["Scope 1","Scope 2"]
+_ELECTRICITY_SUBS = ["Grid Electricity","Diesel Generator Electricity"]
+_FUEL_KEYWORDS = ["Diesel","Petrol","LPG","Coal","Biomass"]
+_SCOPE3_MATERIALS = ["Cement","Steel","Textile","Chemicals","Paper","Cardboard","Plastics","Glass"]
+_SCOPE3_SUB_FACTORS = {
+    "Air Travel": "Air Travel (domestic average)",
+    "Train Travel": "Train per km",
+    "Taxi/Car Rental": "Car per km",
+    "Cars/Vans": "Car per km",
+    "Two-Wheelers": "TwoWheeler per km",
+    "Landfill": "Landfill per kg",
+    "Recycling": "Recycling per kg",
+    "Composting": "Composting per kg",
+}
+
+FactorMatch = namedtuple("FactorMatch", ["factor_key", "factor", "rule"])
+
+def _match_factor_rule(scope_group, key_specific, key_sub, unit_l):
+    """
+    Heuristic factor lookup (the original if/elif chain). Returns FactorMatch;
+    factor is None when no usable factor exists for the matched rule.
+    """
+    if scope_group == "Scope 1/2":
+        fuel_key, rule = None, None
+        if key_sub in _ELECTRICITY_SUBS:
+            fuel_key, rule = "Electricity", "S1/2 electricity sub-activity"
+        else:
+            for fuel in _FUEL_KEYWORDS:
+                if fuel in key_sub:
+                    fuel_key, rule = fuel, f"S1/2 '{fuel}' keyword in sub-activity"
+                    break
+        if fuel_key is None:
+            if unit_l == "kwh":
+                fuel_key, rule = "Electricity", "S1/2 kWh unit fallback"
+            else:
+                return FactorMatch(None, None, "no rule matched")
+        return FactorMatch(fuel_key, emission_factors.get(fuel_key), rule)
+
+    # Scope 3: exact specific item (a zero factor counts), then heuristics (a zero factor is missing)
+    if key_specific and key_specific in emission_factors:
+        return FactorMatch(key_specific, emission_factors[key_specific], "S3 exact specific item")
+    if key_specific in _SCOPE3_MATERIALS:
+        factor_key, rule = key_specific, "S3 material specific item"
+    elif key_sub in _SCOPE3_SUB_FACTORS:
+        factor_key, rule = _SCOPE3_SUB_FACTORS[key_sub], f"S3 '{key_sub}' sub-activity"
+    elif unit_l == "kwh":
+        factor_key, rule = "Product use kWh", "S3 kWh unit (product use)"
+    else:
+        # last resort: activity rows of emission_factors.csv
+        record = factor_library.lookup(key_specific or key_sub, unit_l) if factor_library is not None else None
+        if record is None:
+            return FactorMatch(None, None, "no rule matched")
+        return FactorMatch(record.activity, record.factor_kg or None, "S3 factor library (emission_factors.csv)")
+    return FactorMatch(factor_key, emission_factors.get(factor_key) or None, rule)
+
+def _text(value):
+    # None / NaN read as blank, like fillna("") in the batch path
+    return "" if value is None or pd.isna(value) else str(value)
+
+def _factor_table_key(scope, specific_item, sub_activity, unit):
+    return (
+        "Scope 1/2" if scope in _SCOPE12 else "Scope 3",
+        _text(specific_item).strip(),
+        _text(sub_activity).strip(),
+        _text(unit).lower(),
+    )
+
+def _build_factor_table():
+    """Resolve every (scope, specific item, sub-activity, unit) combination offered by the UI lookups."""
+    units = {u.lower() for u in units_dict.values()} | {"", "kwh", "number of flights", "km traveled", "kg / tonnes"}
+    table = {}
+    for scope, activities in scope_activities.items():
+        for sub_dict in activities.values():
+            for sub_activity, detail in sub_dict.items():
+                specifics = [""] + (detail if isinstance(detail, list) else [])
+                for specific_item in specifics:
+                    for unit in units:
+                        key = _factor_table_key(scope, specific_item, sub_activity, unit)
+                        table[key] = _match_factor_rule(*key)
+    return table
+
+FACTOR_TABLE = _build_factor_table()
+
+@lru_cache(maxsize=65536)
+def _resolve_uncached(key):
+    # free-text specific items / sub-activities from uploads
+    return _match_factor_rule(*key)
+
+def _resolve_key(key):
+    match = FACTOR_TABLE.get(key)
+    return match if match is not None else _resolve_uncached(key)
+
+def resolve_factor(scope, sub_activity, specific_item, unit):
+    """Return the FactorMatch (factor key, factor, rule name) for an entry."""
+    return _resolve_key(_factor_table_key(scope, specific_item, sub_activity, unit))
+
+# ---------------------------
+# Helper: emission calculation for an arbitrary entry
+# ---------------------------
+def calculate_emissions(scope, activity, sub_activity, specific_item, quantity, unit):
+    """
+    Return emissions in kg CO2e for a single entry.
+    Logic (see _match_factor_rule):
+      - For Scope 1 & 2, try to derive factor from sub_activity or activity (common fuels).
+      - For Scope 3, check specific_item first, then sub_activity, then activity with heuristic mapping.
+      - If factor not found, return 0 and a flag to indicate missing factor.
+    """
+    factor = resolve_factor(scope, sub_activity, specific_item, unit).factor
+    if factor is None:
+        return 0.0, True
+    return float(quantity) * factor, False
+
+# ---------------------------
+# Helper: vectorized emission calculation for a whole DataFrame (uploads)
+# ---------------------------
+def _text_column(df, col):
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[col].fillna("").astype(str)
+
+@timed()
+def calculate_emissions_batch(df, return_rules=False):
+    """
+    Vectorized calculate_emissions over a DataFrame with columns
+    Scope, Activity, Sub-Activity, Quantity, Unit and optionally Specific Item.
+    Returns (emissions Series in kg CO2e, missing_factor boolean Series), both aligned to df.index,
+    plus the matched rule per row when return_rules is True.
+    Numbers are identical to calling calculate_emissions row by row.
+    """
+    keys = pd.MultiIndex.from_arrays([
+        np.where(df["Scope"].isin(_SCOPE12), "Scope 1/2", "Scope 3"),
+        _text_column(df, "Specific Item").str.strip(),
+        _text_column(df, "Sub-Activity").str.strip(),
+        _text_column(df, "Unit").str.lower(),
+    ])
+    # resolve each distinct combination once, then broadcast back to rows
+    codes, uniques = keys.factorize()
+    matches = [_resolve_key(key) for key in uniques]
+    factors = np.array([np.nan if m.factor is None else m.factor for m in matches], dtype=float)
+
+    factor = pd.Series(factors[codes], index=df.index)
+    missing = factor.isna()
+    # only rows with a factor touch Quantity, as in the scalar path
+    quantity = pd.to_numeric(df["Quantity"].where(~missing, 0.0)).astype(float)
+    emissions = (quantity * factor).where(~missing, 0.0)
+    if return_rules:
+        rules = pd.Series(np.array([m.rule for m in matches], dtype=object)[codes], index=df.index)
+        return emissions, missing, rules
+    return emissions, missing
+
+@timed()
+def enrich_entries(df):
+    """Set Emissions_kgCO2e (kg, 3 decimals) and Factor_Rule on an entries chunk in place; returns the missing-factor mask."""
+    emissions, missing, rules = calculate_emissions_batch(df, return_rules=True)
+    df["Emissions_kgCO2e"] = [round(e,3) for e in emissions.tolist()]
+    df["Factor_Rule"] = rules
+    return missing
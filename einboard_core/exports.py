@@ -0,0 +1,99 @@
+"""
+Version-cached table exports: CSV, gzip-compressed CSV and Parquet.
+
+Tables are read from the store in rowid-ordered chunks and written straight to a
+file, so memory is bounded by the chunk size rather than the table size. Export
+files are named by database path, store id and table version; downloading
+unchanged data again just reuses the file, and files of older versions (or of an
+earlier database at the same path) are removed when a new one is written.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:     # Parquet export is optional
+    pa = pq = None
+
+EXPORT_DIR = os.environ.get("EINBOARD_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "einboard_exports"))
+EXPORT_CHUNKSIZE = 50_000
+# format label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+_ARROW_TYPES = {"TEXT": "string", "REAL": "float64", "INTEGER": "int64"}
+
+_lock = threading.Lock()
+
+def available_formats():
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "Parquet" or pq is not None]
+
+def iter_table_chunks(store, name, upto_rowid=None, chunksize=EXPORT_CHUNKSIZE):
+    """Yield the rows of a stored table as DataFrames of at most chunksize rows, in insertion order."""
+    after = 0
+    while True:
+        chunk, after = store.read_new(name, after_rowid=after, limit=chunksize, upto_rowid=upto_rowid)
+        if chunk.empty:
+            return
+        yield chunk
+
+def _write_csv(chunks, fh, columns):
+    wrote_header = False
+    for chunk in chunks:
+        fh.write(chunk.to_csv(index=False, header=not wrote_header).encode("utf-8"))
+        wrote_header = True
+    if not wrote_header:
+        fh.write((",".join(columns) + "\n").encode("utf-8"))
+
+def _write_parquet(chunks, path, schema):
+    arrow_schema = pa.schema([(col, getattr(pa, _ARROW_TYPES.get(t, "string"))()) for col, t in schema.items()])
+    with pq.ParquetWriter(path, arrow_schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=arrow_schema, preserve_index=False))
+
+def write_chunks(chunks, path, fmt, schema):
+    """
+    Write DataFrame chunks with the columns of schema ({column: SQLite type}) to path as fmt.
+    The file is written under a temporary name and renamed when complete, so readers never see a partial file.
+    """
+    ext, _ = EXPORT_FORMATS[fmt]
+    if fmt == "Parquet" and pq is None:
+        raise RuntimeError("Parquet export needs the pyarrow package (pip install pyarrow).")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        if fmt == "Parquet":
+            _write_parquet(chunks, tmp, schema)
+        else:
+            with (gzip.open(tmp, "wb", compresslevel=6) if ext.endswith(".gz") else open(tmp, "wb")) as fh:
+                _write_csv(chunks, fh, list(schema))
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    return path
+
+def export_file(store, name, fmt, chunksize=EXPORT_CHUNKSIZE):
+    """Path of table `name` exported as fmt (a key of EXPORT_FORMATS), written only if this table version has no file yet."""
+    ext, _ = EXPORT_FORMATS[fmt]
+    version, last_rowid = store.snapshot(name)
+    path_tag = hashlib.sha1(os.path.abspath(store.path).encode()).hexdigest()[:8]
+    # versions restart when the database is recreated; the store id doesn't repeat
+    prefix = f"{name}-{path_tag}-"
+    filename = f"{prefix}{store.store_id[:12]}-v{version}.{ext}"
+    path = os.path.join(EXPORT_DIR, filename)
+    with _lock:
+        if os.path.exists(path):
+            return path
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        write_chunks(iter_table_chunks(store, name, last_rowid, chunksize), path, fmt, store.schemas[name])
+        for old in os.listdir(EXPORT_DIR):
+            if old.startswith(prefix) and old.endswith(f".{ext}") and old != filename:
+                os.remove(os.path.join(EXPORT_DIR, old))
+    return path
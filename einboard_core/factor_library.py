@@ -0,0 +1,126 @@
+"""
+Emission factor library backed by emission_factors.csv.
+
+The CSV is parsed once and cached on the file's mtime and content hash, so
+lookups during uploads hit in-memory indexes and a factor update only needs
+a new CSV, not a code deploy.
+
+CSV columns: scope, category, activity, unit, emission_factor (t CO2e per unit),
+cost_per_unit_inr and an optional vintage (e.g. the year of a CEA grid factor).
+Rows without a vintage apply to every year.
+"""
+import csv
+import hashlib
+import io
+import os
+import threading
+from bisect import bisect_right
+from collections import defaultdict, namedtuple
+from decimal import Decimal, InvalidOperation
+
+DEFAULT_FACTOR_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "emission_factors.csv")
+
+# factor_kg is kg CO2e per unit (the CSV stores tonnes)
+FactorRecord = namedtuple("FactorRecord", [
+    "scope", "category", "activity", "unit", "factor_kg", "cost_per_unit_inr", "vintage"
+])
+
+_UNIT_ALIASES = {"litres": "liters", "litre": "liters", "liter": "liters", "l": "liters", "ltr": "liters", "m3": "m³"}
+
+def _norm(text):
+    return " ".join(str(text or "").split()).lower()
+
+def _norm_unit(unit):
+    unit = _norm(unit)
+    return _UNIT_ALIASES.get(unit, unit)
+
+def _to_float(text, scale=1):
+    # Decimal keeps 0.00268 t -> 2.68 kg exact instead of 2.6799999999999997
+    try:
+        return float(Decimal(str(text).strip()) * scale)
+    except (InvalidOperation, ValueError):
+        return None
+
+class FactorLibrary:
+    """In-memory factor table with indexes by scope, category and (activity, unit) + vintage."""
+
+    def __init__(self, records, source_hash=""):
+        self.records = records
+        self.source_hash = source_hash
+        self.by_scope = defaultdict(list)
+        self.by_category = defaultdict(list)
+        self._by_activity_unit = defaultdict(dict)   # (activity, unit) -> {vintage: record}
+        for rec in records:
+            self.by_scope[rec.scope].append(rec)
+            if rec.category:
+                self.by_category[rec.category].append(rec)
+            self._by_activity_unit[(_norm(rec.activity), _norm_unit(rec.unit))][rec.vintage] = rec
+        self._vintages = {
+            key: sorted(v for v in versions if v is not None)
+            for key, versions in self._by_activity_unit.items()
+        }
+
+    def __len__(self):
+        return len(self.records)
+
+    def vintages(self, activity, unit):
+        return list(self._vintages.get((_norm(activity), _norm_unit(unit)), []))
+
+    def lookup(self, activity, unit, vintage=None):
+        """
+        Return the FactorRecord for activity+unit, or None.
+        With a vintage, the latest dated row not after it is used; without one, the latest dated row.
+        Undated rows are the fallback in both cases.
+        """
+        key = (_norm(activity), _norm_unit(unit))
+        versions = self._by_activity_unit.get(key)
+        if not versions:
+            return None
+        dated = self._vintages[key]
+        if dated:
+            pos = len(dated) if vintage is None else bisect_right(dated, vintage)
+            if pos:
+                return versions[dated[pos - 1]]
+        return versions.get(None)
+
+def parse_factor_csv(raw):
+    records = []
+    for row in csv.DictReader(io.StringIO(raw.decode("utf-8-sig"))):
+        factor_kg = _to_float(row.get("emission_factor", ""), 1000)
+        if not row.get("activity") or factor_kg is None:
+            continue
+        vintage = (row.get("vintage") or "").strip()
+        records.append(FactorRecord(
+            scope=(row.get("scope") or "").strip(),
+            category=(row.get("category") or "").strip(),
+            activity=row["activity"].strip(),
+            unit=(row.get("unit") or "").strip(),
+            factor_kg=factor_kg,
+            cost_per_unit_inr=_to_float(row.get("cost_per_unit_inr", "")),
+            vintage=int(vintage) if vintage else None,
+        ))
+    return records
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def load_factor_library(path=DEFAULT_FACTOR_CSV):
+    """
+    Return the FactorLibrary for path. Re-parses only when the file's mtime/size change
+    and its content hash differs from the cached copy; otherwise the same object is returned.
+    """
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[2]
+        with open(path, "rb") as fh:
+            raw = fh.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if cached and cached[1] == digest:
+            library = cached[2]
+        else:
+            library = FactorLibrary(parse_factor_csv(raw), digest)
+        _cache[path] = (stamp, digest, library)
+        return library
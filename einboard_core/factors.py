@@ -0,0 +1,59 @@
+"""
+Emission factors used by the engine: built-in starter values (kg CO2e per
+unit), overridden by emission_factors.csv where the CSV has a row in the
+same unit. The CSV is read once, on first import.
+"""
+from .factor_library import load_factor_library
+
+# Basic emission factors (starter). Units: kg CO2e per unit (unit matches units_dict)
+emission_factors = {
+    # fuels
+    "Diesel": 2.68,   # kg CO2e per liter
+    "Petrol": 2.31,
+    "LPG": 1.51,
+    "CNG": 2.02,      # per m3 approx
+    "Coal": 2.42,     # per kg approx
+    "Electricity": 0.82,  # kg CO2e per kWh (India avg)
+    # Scope 1 process defaults (per tonne)
+    "Cement": 900.0,     # kg CO2e per tonne (example)
+    "Steel": 1850.0,     # kg CO2e per tonne (example)
+    "Textile": 300.0,
+    "Chemicals": 1200.0,
+    # packaging / materials (per kg)
+    "Cardboard": 0.9,   # kg CO2e per kg
+    "Plastics": 1.7,
+    "Glass": 0.95,
+    "Paper": 1.2,
+    # travel
+    "Air Travel (domestic average)": 250.0, # per flight approx
+    "Train per km": 0.05,
+    "Taxi per km": 0.12,
+    "TwoWheeler per km": 0.05,
+    "Car per km": 0.12,
+    # waste
+    "Landfill per kg": 1.0,
+    "Recycling per kg": 0.3,
+    "Composting per kg": 0.2,
+    # product use
+    "Product use kWh": 0.82
+}
+
+# emission_factors keys kept in sync with emission_factors.csv: key -> (CSV activity, unit as in units_dict).
+# A CSV row overrides the default above only when its unit matches.
+FACTOR_LIBRARY_SOURCES = {
+    "Diesel": ("Diesel", "Liters"),
+    "Petrol": ("Petrol", "Liters"),
+    "LPG": ("LPG", "Liters"),
+    "CNG": ("CNG", "m³"),
+    "Electricity": ("Electricity (India)", "kWh"),
+}
+
+try:
+    factor_library = load_factor_library()
+except OSError:
+    factor_library = None
+if factor_library is not None:
+    for _key, (_activity, _unit) in FACTOR_LIBRARY_SOURCES.items():
+        _record = factor_library.lookup(_activity, _unit)
+        if _record is not None:
+            emission_factors[_key] = _record.factor_kg
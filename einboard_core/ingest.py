@@ -0,0 +1,314 @@
+"""
+Streaming ingestion of GHG activity uploads.
+
+Files are read in bounded chunks with explicit dtypes, so peak memory stays
+roughly constant whatever the file size. Only the known upload columns are
+read, and the required columns are validated on the first chunk. XLSX
+workbooks are streamed straight from the sheet XML, decoding only the cells
+of the upload columns.
+
+Month values are normalized to the FY month labels ("Apr".."Mar") the cubes
+group by: "April", "2024-04", "04/2024", "Apr-24" and Excel date serials all
+become "Apr", and a value with a year also fills a blank FY. Values that
+can't be read are stored without a month and counted for the caller.
+"""
+import calendar
+import posixpath
+import re
+import zipfile
+from datetime import date, timedelta
+from xml.etree.ElementTree import iterparse
+from xml.parsers import expat
+
+import numpy as np
+import pandas as pd
+
+from .catalog import fiscal_year, months
+
+DEFAULT_CHUNKSIZE = 50_000
+REQUIRED_COLUMNS = ["Scope", "Activity", "Sub-Activity", "Quantity", "Unit"]
+OPTIONAL_COLUMNS = ["Specific Item", "Month", "FY", "Entity", "Site"]
+UPLOAD_COLUMNS = REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+TEXT_COLUMNS = [c for c in UPLOAD_COLUMNS if c not in ("Quantity", "FY")]
+# left as nulls when absent, so the caller can fill them (e.g. from the reporting slice)
+NULLABLE_COLUMNS = ["Month", "FY", "Entity", "Site"]
+NATURAL_KEY_COLUMNS = ["Scope", "Activity", "Sub-Activity", "Specific Item", "Quantity", "Unit", "Month", "FY", "Entity", "Site"]
+ALL_SHEETS = "*"
+
+# lower-case month name / abbreviation -> calendar month number
+_MONTH_NUMBERS = {name.lower(): i for names in (calendar.month_name, calendar.month_abbr) for i, name in enumerate(names) if name}
+_MONTH_NUMBERS["sept"] = 9
+_FY_LABELS = {i + 1: m for i, m in enumerate(calendar.month_abbr[1:]) if m in months}
+_EXCEL_EPOCH = date(1899, 12, 30)
+_SERIAL_RANGE = (20_000, 80_000)    # Excel serials of 1954..2119; smaller numbers are month numbers
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+_YEAR_MONTH_RE = re.compile(r"(\d{4})[-/.](\d{1,2})(?:[-/.]\d{1,2})?(?:[ T].*)?")        # 2024-04, 2024-04-15 00:00:00
+_MONTH_YEAR_RE = re.compile(r"(?:\d{1,2}[-/.])?(\d{1,2})[-/.](\d{4})")                  # 04/2024, 15-04-2024 (day first)
+_NAMED_RE = re.compile(r"(?:\d{1,2}[-/ ]+)?([A-Za-z]+)\.?(?:[-/ ',]+(\d{4}|\d{2}))?")    # April, Apr-24, 15 Apr 2024
+
+class UploadError(ValueError):
+    """Raised when an upload can't be ingested (unsupported type, missing columns)."""
+
+def parse_month(value):
+    """(FY month label, FY start year or None) for an uploaded Month value, or (None, None) if it can't be read."""
+    text = str(value).strip()
+    year = month = None
+    if _NUMBER_RE.fullmatch(text):
+        number = int(float(text))
+        if 1 <= number <= 12:
+            month = number
+        elif _SERIAL_RANGE[0] <= number <= _SERIAL_RANGE[1]:
+            day = _EXCEL_EPOCH + timedelta(days=number)
+            year, month = day.year, day.month
+    elif m := _YEAR_MONTH_RE.fullmatch(text):
+        year, month = int(m.group(1)), int(m.group(2))
+    elif m := _MONTH_YEAR_RE.fullmatch(text):
+        month, year = int(m.group(1)), int(m.group(2))
+    elif m := _NAMED_RE.fullmatch(text):
+        month = _MONTH_NUMBERS.get(m.group(1).lower())
+        if m.group(2):
+            year = int(m.group(2)) + (2000 if len(m.group(2)) == 2 else 0)
+    if month not in _FY_LABELS:
+        return None, None
+    return _FY_LABELS[month], fiscal_year(date(year, month, 1)) if year else None
+
+def _normalize_months(chunk, unparsed):
+    """Month to FY labels and blank FYs from dated Month values, in place; unreadable values go to `unparsed`."""
+    text = chunk["Month"].astype("string").str.strip().replace("", pd.NA)
+    # parse each distinct value once (-1 codes are blanks)
+    codes, values = pd.factorize(text)
+    parsed = [parse_month(v) for v in values]
+    labels = np.array([label for label, _ in parsed] + [None], dtype=object)
+    years = np.array([fy or np.nan for _, fy in parsed] + [np.nan], dtype=float)
+    chunk["Month"] = pd.Series(labels[codes], index=chunk.index, dtype=object)
+    chunk["FY"] = chunk["FY"].fillna(pd.Series(years[codes], index=chunk.index).astype("Int64"))
+    if unparsed is not None:
+        bad = np.bincount(codes[codes >= 0], minlength=len(values))
+        for value, (label, _), rows in zip(values, parsed, bad):
+            if label is None and rows:
+                unparsed[value] = unparsed.get(value, 0) + int(rows)
+
+def _normalize_chunk(chunk, unparsed=None):
+    # text columns get "" for blanks; Quantity stays numeric (unparseable values become NaN)
+    for col in TEXT_COLUMNS + ["FY"]:
+        if col not in chunk.columns:
+            chunk[col] = None if col in NULLABLE_COLUMNS else ""
+        elif col not in NULLABLE_COLUMNS:
+            chunk[col] = chunk[col].fillna("")
+    chunk["Quantity"] = pd.to_numeric(chunk["Quantity"], errors="coerce").astype("float64")
+    # FY as its start year: "2024", "FY2024-25" and "2024-25" all become 2024
+    fy = chunk["FY"].astype("string").str.extract(r"(\d{4})", expand=False)
+    chunk["FY"] = pd.to_numeric(fy, errors="coerce").astype("Int64")
+    _normalize_months(chunk, unparsed)
+    return chunk[UPLOAD_COLUMNS]
+
+def _validate_columns(columns):
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise UploadError(f"Uploaded file must contain columns: {set(REQUIRED_COLUMNS)} (missing {missing})")
+
+def _csv_chunks(fileobj, chunksize):
+    reader = pd.read_csv(
+        fileobj,
+        usecols=lambda c: c in UPLOAD_COLUMNS,
+        dtype={c: "string" for c in UPLOAD_COLUMNS},
+        chunksize=chunksize,
+    )
+    for i, chunk in enumerate(reader):
+        if i == 0:
+            _validate_columns(chunk.columns)
+        yield chunk
+
+def _excel_chunks(fileobj, chunksize, sheet=None):
+    # legacy .xls can't be streamed, so slice the (column-restricted) sheet instead
+    frames = pd.read_excel(
+        fileobj, sheet_name=None if sheet == ALL_SHEETS else (sheet or 0),
+        usecols=lambda c: c in UPLOAD_COLUMNS, dtype={c: "string" for c in UPLOAD_COLUMNS},
+    )
+    for df in (frames.values() if isinstance(frames, dict) else [frames]):
+        _validate_columns(df.columns)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize].copy()
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+def _sheet_paths(zf):
+    """Sheet name -> part path inside the XLSX zip, in workbook order."""
+    rels = {}
+    for _, el in iterparse(zf.open("xl/_rels/workbook.xml.rels")):
+        if el.tag == _PKG_REL_NS + "Relationship":
+            target = el.get("Target")
+            rels[el.get("Id")] = target.lstrip("/") if target.startswith("/") else posixpath.normpath("xl/" + target)
+    sheets = {}
+    for _, el in iterparse(zf.open("xl/workbook.xml")):
+        if el.tag == _NS + "sheet":
+            sheets[el.get("name")] = rels[el.get(_REL_NS + "id")]
+    return sheets
+
+def _shared_strings(zf):
+    try:
+        part = zf.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings = []
+    for _, el in iterparse(part):
+        if el.tag == _NS + "si":
+            strings.append("".join(t.text or "" for t in el.iter(_NS + "t")))
+            el.clear()
+    return strings
+
+def _column_name(index):
+    name = ""
+    while index >= 0:
+        index, rem = divmod(index, 26)
+        name = chr(65 + rem) + name
+        index -= 1
+    return name
+
+_READ_SIZE = 1 << 16
+
+def _iter_sheet_rows(zf, path, shared, keep=UPLOAD_COLUMNS):
+    """
+    Yield {column letter: value} per non-empty row of a worksheet part.
+    The first row is the header; after it only the columns whose header is in `keep` are decoded.
+    Uses expat callbacks directly, so no element tree is built and memory doesn't grow with the sheet.
+    """
+    rows = []
+    state = {"row": {}, "col": None, "type": None, "text": None, "index": 0, "wanted": None}
+
+    def start(name, attrs):
+        tag = name.rpartition(":")[2]
+        if tag == "c":
+            ref = attrs.get("r")
+            col = ref.rstrip("0123456789") if ref else _column_name(state["index"])
+            state["index"] += 1
+            wanted = state["wanted"]
+            state["col"] = col if wanted is None or col in wanted else None
+            state["type"] = attrs.get("t")
+        elif (tag == "v" or tag == "t") and state["col"] is not None:
+            state["text"] = []
+
+    def data(text):
+        if state["text"] is not None:
+            state["text"].append(text)
+
+    def end(name):
+        tag = name.rpartition(":")[2]
+        if tag == "v" or tag == "t":
+            if state["text"] is not None and state["col"] is not None:
+                value = "".join(state["text"])
+                kind = state["type"]
+                if kind == "s":
+                    value = shared[int(value)]
+                elif kind == "e":
+                    value = None
+                if value is not None:
+                    # inline strings may split text across several <t> runs
+                    row = state["row"]
+                    row[state["col"]] = row.get(state["col"], "") + value if tag == "t" else value
+            state["text"] = None
+        elif tag == "row":
+            if state["row"]:
+                if state["wanted"] is None:
+                    state["wanted"] = {col for col, name in state["row"].items() if str(name).strip() in keep}
+                rows.append(state["row"])
+            state["row"], state["index"] = {}, 0
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = data
+    with zf.open(path) as part:
+        while True:
+            block = part.read(_READ_SIZE)
+            parser.Parse(block, not block)
+            yield from rows
+            rows.clear()
+            if not block:
+                return
+
+def list_sheets(fileobj):
+    """Sheet names of an XLSX workbook (reads only the workbook index)."""
+    try:
+        with zipfile.ZipFile(fileobj) as zf:
+            return list(_sheet_paths(zf))
+    finally:
+        fileobj.seek(0)
+
+def _sheet_chunks(zf, path, shared, chunksize):
+    rows = _iter_sheet_rows(zf, path, shared)
+    header = next(rows, {})
+    positions = {str(name).strip(): col for col, name in header.items()}
+    _validate_columns(positions)
+    wanted = [(c, positions[c]) for c in UPLOAD_COLUMNS if c in positions]
+    buffer = {c: [] for c, _ in wanted}
+    n = 0
+    for values in rows:
+        for name, col in wanted:
+            buffer[name].append(values.get(col))
+        n += 1
+        if n == chunksize:
+            yield pd.DataFrame({c: pd.Series(v, dtype="string") for c, v in buffer.items()})
+            buffer = {c: [] for c, _ in wanted}
+            n = 0
+    if n:
+        yield pd.DataFrame({c: pd.Series(v, dtype="string") for c, v in buffer.items()})
+
+def _xlsx_chunks(fileobj, chunksize, sheet=None):
+    """Stream rows of one sheet (default: the first), or of every sheet with the upload columns when sheet is ALL_SHEETS."""
+    with zipfile.ZipFile(fileobj) as zf:
+        paths = _sheet_paths(zf)
+        shared = _shared_strings(zf)
+        if sheet == ALL_SHEETS:
+            matched = False
+            for path in paths.values():
+                try:
+                    yield from _sheet_chunks(zf, path, shared, chunksize)
+                    matched = True
+                except UploadError:
+                    continue    # e.g. a cover or notes sheet
+            if not matched:
+                raise UploadError(f"No sheet contains the required columns: {set(REQUIRED_COLUMNS)}")
+        else:
+            if sheet is not None and sheet not in paths:
+                raise UploadError(f"Sheet {sheet!r} not found in workbook.")
+            yield from _sheet_chunks(zf, paths[sheet] if sheet else next(iter(paths.values())), shared, chunksize)
+
+def row_keys(chunk, seen):
+    """
+    Natural key per row: a 64-bit hash of NATURAL_KEY_COLUMNS plus the row's occurrence number for
+    that value within the upload, so repeated lines in one file are all kept while a re-upload (or an
+    overlapping file) maps onto the keys already stored.
+    `seen` is a dict carrying the occurrence counts across the chunks of one upload; it is updated in place.
+    """
+    hashes = pd.util.hash_pandas_object(chunk[NATURAL_KEY_COLUMNS], index=False)
+    occurrence = hashes.groupby(hashes).cumcount()
+    counts = seen.get("counts")
+    if counts is not None:
+        occurrence += counts.reindex(hashes.values, fill_value=0).to_numpy()
+    counts = hashes.value_counts() if counts is None else counts.add(hashes.value_counts(), fill_value=0)
+    seen["counts"] = counts.astype("int64")
+    keyed = pd.DataFrame({"hash": hashes.to_numpy(), "occurrence": occurrence.to_numpy()})
+    return pd.Series(pd.util.hash_pandas_object(keyed, index=False).to_numpy().view("int64"), index=chunk.index)
+
+def read_upload_chunks(fileobj, filename, chunksize=DEFAULT_CHUNKSIZE, sheet=None, unparsed=None):
+    """
+    Yield normalized DataFrame chunks with exactly UPLOAD_COLUMNS from a CSV/XLS/XLSX upload.
+    For workbooks, `sheet` selects a sheet by name (default: the first) or ALL_SHEETS.
+    `unparsed`, if given, is a dict updated in place with {Month value that couldn't be read: rows}.
+    Raises UploadError on unsupported files or missing required columns.
+    """
+    name = filename.lower()
+    if name.endswith(".csv"):
+        chunks = _csv_chunks(fileobj, chunksize)
+    elif name.endswith(".xlsx"):
+        chunks = _xlsx_chunks(fileobj, chunksize, sheet)
+    elif name.endswith(".xls"):
+        chunks = _excel_chunks(fileobj, chunksize, sheet)
+    else:
+        raise UploadError(f"Unsupported file type for {filename}; upload CSV, XLS or XLSX.")
+    for chunk in chunks:
+        yield _normalize_chunk(chunk, unparsed)
@@ -0,0 +1,165 @@
+"""
+Opt-in timing of dashboard reruns: nested spans around page renderers, report
+KPIs and data-transform stages, optionally with a cProfile of the whole run.
+
+Spans are only recorded while a Tracer is running on the current thread
+(Streamlit runs each session's script on its own thread), so instrumented
+code costs a thread-local lookup when profiling is off. Finished runs can be
+exported in the Chrome trace-event format (chrome://tracing, ui.perfetto.dev).
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+TRACE_DIR = os.environ.get("EINBOARD_TRACE_DIR", os.path.join(tempfile.gettempdir(), "einboard_traces"))
+PROFILE_TOP = 30    # functions listed in a run's cProfile summary
+
+_local = threading.local()
+
+def _active():
+    return getattr(_local, "tracer", None)
+
+class Tracer:
+    """
+    Records one rerun at a time: start(), spans, finish() -> run dict
+    {label, started (epoch s), total_ms, spans: [{name, depth, start_ms, ms}], profile}.
+    With profile=True the run is also cProfiled; only the keep_profiles slowest profiled runs
+    keep their .prof file (in TRACE_DIR) and summary, so profile is None for the others.
+    """
+
+    def __init__(self, keep_profiles=5):
+        self.keep_profiles = keep_profiles
+        self.profiles = []      # (total_ms, path) of the kept profiles, slowest first
+        self._run = None
+        self._stack = []
+        self._profiler = None
+
+    @property
+    def running(self):
+        return self._run is not None
+
+    def start(self, label, profile=False):
+        """Begin a run on this thread; an unfinished previous run (e.g. cut short by st.rerun) is dropped."""
+        if self._profiler is not None:
+            self._profiler.disable()
+        self._run = {"label": label, "started": time.time(), "t0": time.perf_counter(), "spans": []}
+        self._stack = []
+        self._profiler = cProfile.Profile() if profile else None
+        _local.tracer = self
+        if self._profiler is not None:
+            try:
+                self._profiler.enable()
+            except ValueError:      # Python 3.12+ allows one profiler per process; another session has it
+                self._profiler = None
+
+    def begin(self, name):
+        self._stack.append((name, time.perf_counter()))
+
+    def end(self):
+        name, t = self._stack.pop()
+        now = time.perf_counter()
+        self._run["spans"].append({
+            "name": name, "depth": len(self._stack),
+            "start_ms": (t - self._run["t0"]) * 1000, "ms": (now - t) * 1000,
+        })
+
+    def finish(self):
+        profiler, self._profiler = self._profiler, None
+        if profiler is not None:
+            profiler.disable()
+        run, self._run = self._run, None
+        if getattr(_local, "tracer", None) is self:
+            _local.tracer = None
+        while self._stack:     # spans left open by an exception
+            self._stack.pop()
+        run["total_ms"] = (time.perf_counter() - run.pop("t0")) * 1000
+        run["spans"].sort(key=lambda s: s["start_ms"])
+        run["profile"] = self._keep_profile(profiler, run) if profiler is not None else None
+        return run
+
+    def _keep_profile(self, profiler, run):
+        if len(self.profiles) >= self.keep_profiles and run["total_ms"] <= self.profiles[-1][0]:
+            return None
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        path = os.path.join(TRACE_DIR, f"rerun-{int(run['started'] * 1000)}-{os.getpid()}.prof")
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(path)
+        self.profiles.append((run["total_ms"], path))
+        self.profiles.sort(reverse=True)
+        for _, old in self.profiles[self.keep_profiles:]:
+            if os.path.exists(old):
+                os.remove(old)
+        del self.profiles[self.keep_profiles:]
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        return {"path": path, "summary": text.getvalue()}
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as `name` when a Tracer is running on this thread."""
+    tracer = _active()
+    if tracer is None:
+        yield
+        return
+    tracer.begin(name)
+    try:
+        yield
+    finally:
+        tracer.end()
+
+def timed(name=None):
+    """Decorator: time each call as a span (named after the function by default)."""
+    def decorate(func):
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _active()
+            if tracer is None:
+                return func(*args, **kwargs)
+            tracer.begin(label)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.end()
+        return wrapper
+    return decorate
+
+def summarize(run):
+    """Per span name: calls, total / max ms and share of the rerun, slowest first."""
+    by_name = {}
+    for s in run["spans"]:
+        calls, total, peak, depth = by_name.get(s["name"], (0, 0.0, 0.0, s["depth"]))
+        by_name[s["name"]] = (calls + 1, total + s["ms"], max(peak, s["ms"]), min(depth, s["depth"]))
+    rows = [{"Stage": "  " * depth + name, "Calls": calls, "Total ms": round(total, 1), "Max ms": round(peak, 1),
+             "% of rerun": round(100 * total / run["total_ms"], 1) if run["total_ms"] else 0.0}
+            for name, (calls, total, peak, depth) in by_name.items()]
+    return sorted(rows, key=lambda r: r["Total ms"], reverse=True)
+
+def chrome_trace(runs):
+    """Runs as Chrome trace-event JSON (one complete event per span, reruns laid out on their wall-clock start)."""
+    events = []
+    for i, run in enumerate(runs):
+        origin = run["started"] * 1e6
+        events.append({"name": f"rerun: {run['label']}", "ph": "X", "ts": origin, "dur": run["total_ms"] * 1000,
+                       "pid": 1, "tid": 1, "args": {"rerun": i}})
+        events += [{"name": s["name"], "ph": "X", "ts": origin + s["start_ms"] * 1000, "dur": s["ms"] * 1000,
+                    "pid": 1, "tid": 1} for s in run["spans"]]
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def write_trace(runs, path=None):
+    """Write runs as a Chrome trace file (default: a timestamped file in TRACE_DIR); returns the path."""
+    if path is None:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        path = os.path.join(TRACE_DIR, f"einboard-trace-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as fh:
+        json.dump(chrome_trace(runs), fh)
+    return path
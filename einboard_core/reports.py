@@ -0,0 +1,108 @@
+"""
+Report KPIs (BRSR, CDP, GRI, TCFD) computed from the table cubes of a TableStore.
+
+Each map sends a KPI label to a function of a ReportKpis, which answers table
+aggregates for one partition slice and falls back to manually entered values
+(e.g. a Streamlit session state) where a table has no rows yet.
+"""
+from .profiling import span, timed
+from .storage import ROW_COUNT
+
+@timed()
+def ghg_summaries(store, filters=None):
+    """Return scope totals in tonnes (tCO2e) for the partition filters, from the entries aggregate cube."""
+    # entries Emissions_kgCO2e column is kg, convert to tonnes
+    totals = {"scope1_t":0.0,"scope2_t":0.0,"scope3_t":0.0,"total_t":0.0}
+    by_scope = store.cube("entries", ["Emissions_kgCO2e"], by=["Scope"], filters=filters)
+    sums = dict(zip(by_scope["Scope"], by_scope["Emissions_kgCO2e"]))
+    s1 = sums.get("Scope 1", 0.0)
+    s2 = sums.get("Scope 2", 0.0)
+    s3 = sums.get("Scope 3", 0.0)
+    if sums:
+        totals["scope1_t"] = round(s1 / 1000.0, 3)
+        totals["scope2_t"] = round(s2 / 1000.0, 3)
+        totals["scope3_t"] = round(s3 / 1000.0, 3)
+        totals["total_t"] = round((s1 + s2 + s3) / 1000.0, 3)
+    return totals
+
+class ReportKpis:
+    """KPI inputs for one slice: aggregates of store restricted to filters, manual values from `manual`."""
+
+    def __init__(self, store, filters=None, manual=None):
+        self.store = store
+        self.filters = dict(filters or {})
+        self.manual = manual if manual is not None else {}
+        self._ghg = None
+
+    def ghg(self):
+        if self._ghg is None:
+            self._ghg = ghg_summaries(self.store, self.filters)
+        return self._ghg
+
+    def kpi(self, table, column, how="sum"):
+        return self.store.aggregate(table, column, how, self.filters)
+
+    def total(self, table, column):
+        return float(self.kpi(table, column))
+
+    def count(self, table):
+        return int(self.kpi(table, ROW_COUNT))
+
+    def get(self, key, default=0):
+        return self.manual.get(key, default)
+
+# Mapping dictionaries - map report KPI labels to functions of a ReportKpis
+BRSR_MAP = {
+    # Environment - Principle 6 examples
+    "P6 - Scope1 Emissions (tCO2e)": lambda k: k.ghg()["scope1_t"],
+    "P6 - Scope2 Emissions (tCO2e)": lambda k: k.ghg()["scope2_t"],
+    "P6 - Scope3 Emissions (tCO2e)": lambda k: k.ghg()["scope3_t"],
+    "P6 - Total Emissions (tCO2e)": lambda k: k.ghg()["total_t"],
+    "P6 - Energy (kWh)": lambda k: int(k.total("renewable_entries", "Energy_kWh")),
+    "P6 - Water Usage (m3)": lambda k: k.total("water_data", "Quantity_m3"),
+    "P6 - Waste (kg)": lambda k: k.total("waste_data", "Quantity_kg"),
+    # Social - Principle 3 examples
+    "P3 - Total Employees": lambda k: int(k.kpi("employee_data", "Total_Employees", "max") if k.count("employee_data") else k.get("employee_count",0)),
+    "P3 - Training Hours per Employee (avg)": lambda k: float(k.kpi("employee_data", "Training_Hours", "mean") if k.count("employee_data") else k.get("training_hours",0.0)),
+    "P3 - Attrition Rate (%)": lambda k: float(k.kpi("employee_data", "Attrition_rate", "mean") if k.count("employee_data") else k.get("attrition_rate",0.0)),
+    # Governance - Principle 1 examples
+    "P1 - Board Independence (%)": lambda k: (int(k.kpi("board_data", "Independent_Directors", "max"))/int(k.kpi("board_data", "Board_Size", "max"))*100) if (k.count("board_data") and k.kpi("board_data", "Board_Size", "max")>0) else ( (k.get("independent_directors",0)/k.get("board_size",1))*100 ),
+}
+
+CDP_MAP = {
+    "Scope 1 (tCO2e)": lambda k: k.ghg()["scope1_t"],
+    "Scope 2 (tCO2e)": lambda k: k.ghg()["scope2_t"],
+    "Scope 3 (tCO2e)": lambda k: k.ghg()["scope3_t"],
+    "Total Energy (kWh)": lambda k: int(k.total("renewable_entries", "Energy_kWh") + 0), # energy from renewables + scope1_2 energy mapping if available
+    "Climate Risks": lambda k: k.count("risk_data")
+}
+
+GRI_MAP = {
+    "GRI 305 - Total GHG Emissions (tCO2e)": lambda k: k.ghg()["total_t"],
+    "GRI 302 - Energy Consumption (kWh)": lambda k: int(k.total("renewable_entries", "Energy_kWh")),
+    "GRI 303 - Water Withdrawal (m3)": lambda k: k.total("water_data", "Quantity_m3"),
+    "GRI 306 - Waste Generated (kg)": lambda k: k.total("waste_data", "Quantity_kg"),
+    "GRI 401 - Number of Employees": lambda k: int(k.kpi("employee_data", "Total_Employees", "max") if k.count("employee_data") else k.get("employee_count",0)),
+    "GRI 405 - % of female employees": lambda k: float((k.get("women_percentage",0.0)))
+}
+
+TCFD_MAP = {
+    "Governance - Board Oversight of Climate": lambda k: "Yes" if ( (k.count("board_data") and k.kpi("board_data", "Meetings_per_year", "max")>0) or k.get("board_oversight", False) ) else "No",
+    "Strategy - Climate Risks count": lambda k: k.count("risk_data"),
+    "Risk Management - Process exists": lambda k: "Yes" if (k.count("risk_data") or k.get("risk_process", False)) else "No",
+    "Metrics - Scope1+2 (tCO2e)": lambda k: round(k.ghg()["scope1_t"] + k.ghg()["scope2_t"], 3),
+    "Metrics - Energy Consumption (kWh)": lambda k: int(k.total("renewable_entries", "Energy_kWh"))
+}
+
+REPORT_MAPS = {"BRSR": BRSR_MAP, "CDP": CDP_MAP, "GRI": GRI_MAP, "TCFD": TCFD_MAP}
+
+def compute_report(mapping, kpis):
+    """{label: value} for a report map; a KPI that fails reports its error instead of failing the report."""
+    values = {}
+    for kpi, func in mapping.items():
+        try:
+            with span(f"kpi: {kpi}"):
+                values[kpi] = func(kpis)
+        except Exception as e:
+            values[kpi] = f"Error: {e}"
+    return values
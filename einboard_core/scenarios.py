@@ -0,0 +1,238 @@
+"""
+Decarbonization scenarios over the entries baseline.
+
+The baseline is the entries cube summed per (Scope, Activity, Sub-Activity,
+Unit). Three levers act on the fuel and electricity cells of that matrix:
+
+  renewable_electricity   a share of grid electricity moved to a renewable tariff
+  fuel_switch             a share of Stationary Combustion fuel energy moved to
+                          another fuel (CNG by default), matched on calorific value
+  fleet_electrification   a share of Mobile Combustion fuel energy replaced by
+                          grid-charged EVs (ev_kwh_per_fuel_kwh kWh per kWh of fuel)
+
+Every lever is linear in its share, so the matrix is transformed once, cell
+by cell and vectorized, into per-lever totals (LeverTotals). A scenario is
+then a handful of array operations on those totals: a sweep of a million
+parameter combinations evaluates as whole NumPy arrays, and is chunked over a
+process pool when one is given. Costs are annual operating-cost deltas from
+cost_per_unit_inr in emission_factors.csv (capex is not modelled); fuels
+without a price there are left out of the levers. Fuel quantities are
+converted from their catalogue unit to the unit the fuel is priced in (LPG
+litres and CNG m³ to kg) before prices, calorific values and factors apply;
+rows in a unit with no known conversion are left out too.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .energy import CALORIFIC_VALUES
+from .factors import FACTOR_LIBRARY_SOURCES, emission_factors, factor_library
+
+LEVERS = {
+    "renewable_electricity": "Grid electricity to renewables",
+    "fuel_switch": "Stationary combustion fuel switch",
+    "fleet_electrification": "Fleet electrification",
+}
+# lever -> its share parameter
+LEVER_SHARES = {"renewable_electricity": "renewable_share", "fuel_switch": "fuel_switch_share",
+                "fleet_electrification": "ev_share"}
+
+# scenario parameters and their defaults; any of them may be an array in evaluate() / sweep()
+SCENARIO_PARAMS = {
+    "renewable_share": 0.0,         # of grid electricity
+    "fuel_switch_share": 0.0,       # of stationary combustion fuel energy
+    "ev_share": 0.0,                # of mobile combustion fuel energy
+    "renewable_tariff_inr": 4.5,    # per kWh, assumed PPA / open-access tariff
+    "ev_kwh_per_fuel_kwh": 0.3,     # grid kWh per kWh of displaced fuel
+    "growth": 0.0,                  # annual activity growth
+}
+
+# reduction vs the base year (SBTi 1.5 °C near-term and long-term absolute targets)
+TARGETS = {2030: 0.42, 2050: 0.90}
+# levers ramp up linearly from the base year and are fully adopted from this year on
+FULL_ADOPTION_YEAR = 2030
+
+# fuels recognised in sub-activity names, and the fuels a fuel switch can move to
+LEVER_FUELS = ["Diesel","Petrol","LPG","CNG","Coal"]
+SWITCH_TARGETS = ["CNG","LPG"]
+
+# fuel -> (emission_factors.csv activity, unit) holding its cost_per_unit_inr
+COST_SOURCES = {
+    "Diesel": ("Diesel", "liters"),
+    "Petrol": ("Petrol", "liters"),
+    "CNG": ("CNG", "kg"),
+    "LPG": ("LPG", "kg"),
+    "Electricity": ("Electricity (India)", "kWh"),
+}
+# fuel -> the unit lever maths work in: its COST_SOURCES unit, which CALORIFIC_VALUES are also per
+LEVER_UNITS = {fuel: unit for fuel, (_, unit) in COST_SOURCES.items()}
+# (fuel, lower-case catalogue unit) -> lever units per catalogue unit
+UNIT_CONVERSIONS = {
+    ("Diesel", "liters"): 1.0, ("Petrol", "liters"): 1.0,
+    ("LPG", "liters"): 0.51,    # kg per litre of liquid LPG
+    ("CNG", "m³"): 0.72,        # kg per m³ of natural gas at 15 °C
+    ("LPG", "kg"): 1.0, ("CNG", "kg"): 1.0,
+}
+
+# kg / kWh / INR totals of the baseline cells each lever acts on
+LeverTotals = namedtuple("LeverTotals", [
+    "baseline_kg", "grid_kwh", "grid_kg", "grid_factor", "grid_cost",
+    "switch_kg", "switch_target_kg", "switch_cost_delta",
+    "fleet_kg", "fleet_fuel_kwh", "fleet_fuel_cost",
+])
+
+def unit_costs():
+    """{fuel: INR per catalogue unit} from emission_factors.csv; fuels without a price are absent."""
+    if factor_library is None:
+        return {}
+    costs = {}
+    for fuel, (activity, unit) in COST_SOURCES.items():
+        record = factor_library.lookup(activity, unit)
+        if record is not None and record.cost_per_unit_inr is not None:
+            costs[fuel] = record.cost_per_unit_inr
+    return costs
+
+def lever_factor(fuel):
+    """emission_factors[fuel] (kg CO2e per catalogue unit) per lever unit instead; NaN without a conversion."""
+    _, unit = FACTOR_LIBRARY_SOURCES.get(fuel, (fuel, LEVER_UNITS.get(fuel, "")))
+    return emission_factors[fuel] / UNIT_CONVERSIONS.get((fuel, unit.lower()), np.nan)
+
+def baseline_matrix(store, filters=None):
+    """Quantity and Emissions_kgCO2e per (Scope, Activity, Sub-Activity, Unit), from the entries cube."""
+    return store.cube("entries", ["Quantity","Emissions_kgCO2e"], by=["Scope","Activity","Sub-Activity","Unit"], filters=filters)
+
+def lever_totals(matrix, switch_to="CNG"):
+    """Reduce a baseline_matrix() to the LeverTotals the levers scale, for a fuel switch to `switch_to`."""
+    costs = unit_costs()
+    sub = matrix["Sub-Activity"].fillna("").astype(str)
+    activity = matrix["Activity"].fillna("").astype(str)
+    unit = matrix["Unit"].fillna("").astype(str).str.lower()
+    qty = matrix["Quantity"].to_numpy(dtype=float)
+    kg = matrix["Emissions_kgCO2e"].to_numpy(dtype=float)
+    fuel = pd.Series(np.select([sub.str.contains(f, regex=False) for f in LEVER_FUELS], LEVER_FUELS, default=""), index=matrix.index)
+    # fuel quantities in lever units (NaN where the row's unit can't be converted)
+    fuel_qty = qty * np.array([UNIT_CONVERSIONS.get((f, u), np.nan) for f, u in zip(fuel, unit)], dtype=float)
+    price = fuel.map(costs).to_numpy(dtype=float)
+    mj = fuel_qty * fuel.map(CALORIFIC_VALUES).to_numpy(dtype=float)
+    priced = ~np.isnan(price) & ~np.isnan(mj)
+
+    grid = sub.eq("Grid Electricity").to_numpy()
+    switch = (activity.eq("Stationary Combustion") & fuel.ne(switch_to)).to_numpy() & priced
+    fleet = activity.eq("Mobile Combustion").to_numpy() & priced
+    # fuel-switch target quantity delivering the same energy
+    target_qty = np.where(switch, mj, 0.0) / CALORIFIC_VALUES[switch_to]
+    return LeverTotals(
+        baseline_kg=float(kg.sum()),
+        grid_kwh=float(qty[grid].sum()),
+        grid_kg=float(kg[grid].sum()),
+        grid_factor=emission_factors["Electricity"],
+        grid_cost=costs.get("Electricity", np.nan),
+        switch_kg=float(kg[switch].sum()),
+        switch_target_kg=float(target_qty.sum() * lever_factor(switch_to)),
+        switch_cost_delta=float(target_qty.sum() * costs.get(switch_to, np.nan) - (fuel_qty * price)[switch].sum()),
+        fleet_kg=float(kg[fleet].sum()),
+        fleet_fuel_kwh=float(mj[fleet].sum() / 3.6),
+        fleet_fuel_cost=float((fuel_qty * price)[fleet].sum()),
+    )
+
+def _project(baseline_t, abatement_t, growth, years, base_year, full_by):
+    """Emissions (t) in `years`: activity grows by `growth` a year while the levers ramp up to full_by."""
+    elapsed = np.asarray(years, dtype=float) - base_year
+    ramp = np.clip(elapsed / max(full_by - base_year, 1), 0.0, 1.0)
+    return (1 + growth) ** elapsed * (baseline_t - ramp * abatement_t)
+
+def evaluate(totals, params, base_year, full_by=FULL_ADOPTION_YEAR):
+    """
+    Scenario results for params ({name: scalar or array}, defaults from SCENARIO_PARAMS), broadcast together.
+    Returns {column: array}: abatement (t) and annual cost (INR) per lever at full adoption, their totals,
+    cost per tonne, and for each TARGETS year the projected emissions and whether the target is met.
+    """
+    p = {name: np.asarray(params.get(name, default), dtype=float) for name, default in SCENARIO_PARAMS.items()}
+    shape = np.broadcast_shapes(*(v.shape for v in p.values()))
+    re, tariff = p["renewable_share"], p["renewable_tariff_inr"]
+    ev_kwh = totals.fleet_fuel_kwh * p["ev_kwh_per_fuel_kwh"]
+    # EVs charge on the same grid mix, so their emissions and tariff follow the renewable share
+    abatement = {
+        "renewable_electricity": re * totals.grid_kg,
+        "fuel_switch": p["fuel_switch_share"] * (totals.switch_kg - totals.switch_target_kg),
+        "fleet_electrification": p["ev_share"] * (totals.fleet_kg - ev_kwh * totals.grid_factor * (1 - re)),
+    }
+    cost = {
+        "renewable_electricity": re * totals.grid_kwh * (tariff - totals.grid_cost),
+        "fuel_switch": p["fuel_switch_share"] * totals.switch_cost_delta,
+        "fleet_electrification": p["ev_share"] * (ev_kwh * ((1 - re) * totals.grid_cost + re * tariff) - totals.fleet_fuel_cost),
+    }
+    baseline_t = totals.baseline_kg / 1000
+    out = {}
+    for lever in LEVERS:
+        out[f"{lever}_t"] = np.broadcast_to(abatement[lever] / 1000, shape)
+        out[f"{lever}_inr"] = np.broadcast_to(cost[lever], shape)
+    abatement_t = sum(out[f"{lever}_t"] for lever in LEVERS)
+    out["Abatement_t"] = abatement_t
+    out["Residual_t"] = baseline_t - abatement_t
+    out["Cost_INR"] = sum(out[f"{lever}_inr"] for lever in LEVERS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["Cost_per_t"] = np.where(abatement_t > 0, out["Cost_INR"] / abatement_t, np.nan)
+    for year, reduction in TARGETS.items():
+        projected = _project(baseline_t, abatement_t, p["growth"], year, base_year, full_by)
+        out[f"Emissions_{year}_t"] = np.broadcast_to(projected, shape)
+        out[f"Meets_{year}"] = np.broadcast_to(projected <= (1 - reduction) * baseline_t, shape)
+    return out
+
+def pathway(totals, params, base_year, end_year=2050, full_by=FULL_ADOPTION_YEAR):
+    """Year-by-year emissions (t) of one scenario next to the no-action trend and the target trajectory."""
+    years = np.arange(base_year, end_year + 1)
+    baseline_t = totals.baseline_kg / 1000
+    growth = params.get("growth", SCENARIO_PARAMS["growth"])
+    abatement_t = float(evaluate(totals, params, base_year, full_by)["Abatement_t"])
+    # straight lines from the base year through each target year
+    anchors = [base_year] + sorted(TARGETS)
+    levels = [baseline_t] + [(1 - TARGETS[y]) * baseline_t for y in sorted(TARGETS)]
+    return pd.DataFrame({
+        "Year": years,
+        "Scenario_t": _project(baseline_t, abatement_t, growth, years, base_year, full_by),
+        "No_action_t": _project(baseline_t, 0.0, growth, years, base_year, full_by),
+        "Target_t": np.interp(years, anchors, levels),
+    })
+
+def parameter_grid(**axes):
+    """Every combination of the given parameter values, one row each: parameter_grid(ev_share=[0, .5, 1], ...)."""
+    return pd.MultiIndex.from_product(list(axes.values()), names=list(axes)).to_frame(index=False)
+
+def _evaluate_frame(totals, grid, base_year, full_by):
+    return pd.DataFrame(evaluate(totals, {c: grid[c].to_numpy() for c in grid.columns}, base_year, full_by), index=grid.index)
+
+def sweep(totals, grid, base_year, full_by=FULL_ADOPTION_YEAR, executor=None, chunk_rows=250_000):
+    """
+    Evaluate every row of a parameter_grid() and return it with the evaluate() columns added.
+    With an executor (e.g. a ProcessPoolExecutor) grids longer than chunk_rows are split into chunks evaluated in parallel.
+    """
+    if executor is None or len(grid) <= chunk_rows:
+        results = _evaluate_frame(totals, grid, base_year, full_by)
+    else:
+        chunks = [grid.iloc[i:i + chunk_rows] for i in range(0, len(grid), chunk_rows)]
+        futures = [executor.submit(_evaluate_frame, totals, chunk, base_year, full_by) for chunk in chunks]
+        results = pd.concat([f.result() for f in futures])
+    return pd.concat([grid, results], axis=1)
+
+def macc(totals, params, base_year):
+    """
+    Marginal abatement cost curve: each lever alone at its share in params, cheapest tonne first.
+    Columns: Lever, Abatement_t, Cost_INR, Cost_per_t, Start_t (left edge of its bar) and Cumulative_t.
+    Levers that abate nothing are left out.
+    """
+    rows = []
+    for lever, share in LEVER_SHARES.items():
+        alone = {**params, **{s: 0.0 for s in LEVER_SHARES.values() if s != share}}
+        result = evaluate(totals, alone, base_year)
+        abatement_t = float(result[f"{lever}_t"])
+        if abatement_t <= 0:
+            continue
+        cost = float(result[f"{lever}_inr"])
+        rows.append({"Lever": LEVERS[lever], "Abatement_t": abatement_t, "Cost_INR": cost, "Cost_per_t": cost / abatement_t})
+    curve = pd.DataFrame(rows, columns=["Lever","Abatement_t","Cost_INR","Cost_per_t"])
+    curve = curve.sort_values("Cost_per_t", na_position="last").reset_index(drop=True)
+    curve["Cumulative_t"] = curve["Abatement_t"].cumsum()
+    curve["Start_t"] = curve["Cumulative_t"] - curve["Abatement_t"]
+    return curve
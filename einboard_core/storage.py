@@ -0,0 +1,623 @@
+"""
+SQLite persistence for the dashboard tables.
+
+Every table that used to live only in st.session_state is stored in one local
+SQLite file. Pages read just the columns they need, and rows survive session
+ends and are shared across browser tabs. Each table has a version counter that
+is bumped on write so callers can cache reads until the table changes.
+
+Every table carries the reporting dimensions FY (fiscal year start, e.g. 2024
+for FY2024-25), Entity and Site, and rows are indexed on that partition key.
+Each table also has a materialized aggregate cube (_cube_<table>) keyed by the
+partition plus the table's CUBE_KEYS (scope, category, month, type...), holding
+the sum, non-null count and max of every numeric column. Cubes are updated in
+the same transaction as each append, so KPIs and charts read a few cube rows
+instead of scanning the table.
+
+One TableStore is shared by every session of a server process (and several
+processes may open the same file). Writes go through a single writer
+connection, serialized by a lock in-process and by BEGIN IMMEDIATE across
+processes (SQLite allows one writer at a time). Reads check a connection out
+of a small pool; in WAL mode each read transaction sees a consistent snapshot
+and never waits for a writer. Every committed append bumps the table's
+version, which wait_for_change() / changed_since() turn into change
+notifications for other sessions.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DB_PATH = os.environ.get(
+    "EINBOARD_DB", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "einboard_data.sqlite")
+)
+
+# table -> {column: SQLite type}, in display order
+TABLE_SCHEMAS = {
+    "entries": {
+        "Scope": "TEXT", "Activity": "TEXT", "Sub-Activity": "TEXT", "Specific Item": "TEXT",
+        "Quantity": "REAL", "Unit": "TEXT", "Month": "TEXT", "Emissions_kgCO2e": "REAL", "Factor_Rule": "TEXT",
+    },
+    "renewable_entries": {
+        "Source": "TEXT", "Location": "TEXT", "Month": "TEXT", "Energy_kWh": "REAL", "CO2e_kg": "REAL", "Type": "TEXT",
+    },
+    "water_data": {
+        "Location": "TEXT", "Source": "TEXT", "Month": "TEXT", "Quantity_m3": "REAL", "Cost_INR": "REAL",
+    },
+    "advanced_water_data": {
+        "Location": "TEXT", "Month": "TEXT", "Rainwater_Harvested_m3": "REAL", "Water_Recycled_m3": "REAL",
+        "Treatment_Before_Discharge": "TEXT", "STP_ETP_Capacity_kL_day": "REAL",
+    },
+    "waste_data": {
+        "Location": "TEXT", "Waste_Type": "TEXT", "Month": "TEXT", "Quantity_kg": "REAL", "Treatment": "TEXT",
+        "Emissions_kgCO2e": "REAL",
+    },
+    "biodiversity_data": {
+        "Site": "TEXT", "Impact_Type": "TEXT", "Area_ha": "REAL", "Mitigation": "TEXT", "Notes": "TEXT",
+    },
+    # output volumes, the denominators of intensity metrics
+    "production_data": {
+        "Product": "TEXT", "Month": "TEXT", "Quantity": "REAL", "Unit": "TEXT",
+    },
+    "employee_data": {
+        "Year": "INTEGER", "Total_Employees": "INTEGER", "New_Hires": "INTEGER", "Attrition_rate": "REAL",
+        "Training_Hours": "REAL",
+    },
+    "hs_data": {
+        "Site": "TEXT", "Incidents": "INTEGER", "Lost_Time_Days": "INTEGER", "Near_Misses": "INTEGER",
+        "Safety_Training_Hours": "REAL",
+    },
+    "csr_data": {
+        "Project": "TEXT", "Spend_INR": "REAL", "Beneficiaries": "INTEGER", "Year": "INTEGER",
+    },
+    "board_data": {
+        "Board_Size": "INTEGER", "Independent_Directors": "INTEGER", "Gender_Diversity": "REAL",
+        "Meetings_per_year": "INTEGER",
+    },
+    "policy_data": {
+        "Policy_Name": "TEXT", "Implemented": "INTEGER", "Last_Review_Date": "TEXT", "Notes": "TEXT",
+    },
+    "compliance_data": {
+        "Regulation": "TEXT", "Status": "TEXT", "Notes": "TEXT", "Last_Reviewed": "TEXT",
+    },
+    "risk_data": {
+        "Risk": "TEXT", "Category": "TEXT", "Likelihood": "TEXT", "Impact": "TEXT", "Mitigation": "TEXT", "Owner": "TEXT",
+    },
+}
+
+# reporting dimensions added to every table; together they form the partition key
+DIMENSION_COLUMNS = {"FY": "INTEGER", "Entity": "TEXT", "Site": "TEXT"}
+for _schema in TABLE_SCHEMAS.values():
+    for _col, _type in DIMENSION_COLUMNS.items():
+        _schema.setdefault(_col, _type)
+
+# cube key columns beyond the partition dimensions; tables not listed aggregate per partition only
+CUBE_KEYS = {
+    "entries": ["Scope", "Activity", "Sub-Activity", "Unit", "Month"],
+    "renewable_entries": ["Type", "Source", "Month"],
+    "water_data": ["Source", "Month"],
+    "advanced_water_data": ["Month"],
+    "waste_data": ["Waste_Type", "Treatment", "Month"],
+    "production_data": ["Product", "Unit", "Month"],
+}
+# cube column holding the number of rows in a cell
+ROW_COUNT = "rows"
+
+# tables deduplicated on a hidden natural-key column; rows written without a key are never deduplicated
+ROW_KEY_COLUMN = "_row_key"
+KEYED_TABLES = {"entries"}
+
+# columns indexed for server-side filtering / sorting
+TABLE_INDEXES = {"entries": ["Scope", "Activity", "Month"]}
+
+# idle read connections kept open per store; seconds a connection waits for another process's write lock
+READ_POOL_SIZE = 8
+BUSY_TIMEOUT = 30.0
+
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.int32, int)
+sqlite3.register_adapter(np.float32, float)
+sqlite3.register_adapter(np.bool_, bool)
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+class TableStore:
+    """Column-selective reads and batched appends over the tables in TABLE_SCHEMAS."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, schemas=TABLE_SCHEMAS, pool_size=READ_POOL_SIZE):
+        self.path = path
+        self.schemas = schemas
+        self.pool_size = pool_size
+        self._lock = threading.Lock()           # serializes the writer connection
+        self._changed = threading.Condition()   # notified after every committed write
+        self._idle = queue.LifoQueue()          # pooled read connections
+        self._closed = False
+        self._conn = self._connect()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._writing():
+            self._conn.execute("CREATE TABLE IF NOT EXISTS _table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS _ingested_files (file_key TEXT PRIMARY KEY, name TEXT, rows INTEGER, ingested_at TEXT)"
+            )
+            # random id set when the file is created, so a recreated database (versions back at 0) is told apart
+            self._conn.execute("CREATE TABLE IF NOT EXISTS _store_meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._conn.execute("INSERT OR IGNORE INTO _store_meta VALUES ('store_id', ?)", (uuid.uuid4().hex,))
+            self.store_id = self._conn.execute("SELECT value FROM _store_meta WHERE key = 'store_id'").fetchone()[0]
+            for name, schema in schemas.items():
+                self._ensure_table(name, schema)
+                self._ensure_cube(name)
+
+    def _ensure_table(self, name, schema):
+        cols = ", ".join(f"{_quote(c)} {t}" for c, t in schema.items())
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(name)} ({cols})")
+        # columns added to a schema after the table was created
+        existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({_quote(name)})")}
+        for col, col_type in schema.items():
+            if col not in existing:
+                self._conn.execute(f"ALTER TABLE {_quote(name)} ADD COLUMN {_quote(col)} {col_type}")
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {_quote(name + '_partition')} ON {_quote(name)} ({', '.join(_quote(c) for c in DIMENSION_COLUMNS)})"
+        )
+        for col in TABLE_INDEXES.get(name, []):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'{name}_{col}')} ON {_quote(name)} ({_quote(col)})")
+        if name in KEYED_TABLES:
+            if ROW_KEY_COLUMN not in existing:
+                # no declared type: upload keys are 64-bit ints, PDF bill keys are text
+                self._conn.execute(f"ALTER TABLE {_quote(name)} ADD COLUMN {ROW_KEY_COLUMN}")
+            self._conn.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {_quote(name + ROW_KEY_COLUMN)} ON {_quote(name)} ({ROW_KEY_COLUMN})"
+            )
+        self._conn.execute("INSERT OR IGNORE INTO _table_versions VALUES (?, 0)", (name,))
+
+    def _connect(self, readonly=False):
+        # autocommit: transactions are opened explicitly by _writing() / _reading()
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def _writing(self):
+        """One write transaction on the writer connection; other sessions are notified after it commits."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        with self._changed:
+            self._changed.notify_all()
+
+    @contextmanager
+    def _reading(self):
+        """A pooled read connection inside one read transaction, i.e. a single snapshot of the database."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect(readonly=True)
+        try:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+        except BaseException:
+            conn.close()
+            raise
+        if self._closed or self._idle.qsize() >= self.pool_size:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    def columns(self, name):
+        return list(self.schemas[name])
+
+    def measures(self, name):
+        """Numeric, non-dimension columns: the ones aggregated in the cube."""
+        return [c for c, t in self.schemas[name].items() if t in ("REAL", "INTEGER") and c not in DIMENSION_COLUMNS]
+
+    def cube_keys(self, name):
+        return list(DIMENSION_COLUMNS) + CUBE_KEYS.get(name, [])
+
+    def _ensure_cube(self, name):
+        """Create _cube_<name>; (re)build it from the table when it is new or its layout changed."""
+        cube = _quote(f"_cube_{name}")
+        keys, measures = self.cube_keys(name), self.measures(name)
+        values = [(ROW_COUNT, "INTEGER")] + [(m + suffix, kind) for m in measures
+                                             for suffix, kind in (("", "REAL"), ("__n", "INTEGER"), ("__max", "REAL"))]
+        expected = keys + [col for col, _ in values]
+        existing = [row[1] for row in self._conn.execute(f"PRAGMA table_info({cube})")]
+        if existing == expected:
+            return
+        self._conn.execute(f"DROP TABLE IF EXISTS {cube}")
+        columns = [f"{_quote(k)} NOT NULL" for k in keys] + [f"{_quote(col)} {kind}" for col, kind in values]
+        self._conn.execute(f"CREATE TABLE {cube} ({', '.join(columns)}, PRIMARY KEY ({', '.join(_quote(k) for k in keys)}))")
+        self._update_cube(name, 0)
+
+    def _update_cube(self, name, after_rowid):
+        """Fold rows with rowid > after_rowid into the cube in one GROUP BY + upsert (called inside the write transaction)."""
+        keys, measures = self.cube_keys(name), self.measures(name)
+        key_exprs = [f"COALESCE({_quote(k)}, {0 if k == 'FY' else repr('')})" for k in keys]
+        value_exprs = ["COUNT(*)"]
+        updates = [f"{ROW_COUNT} = {ROW_COUNT} + excluded.{ROW_COUNT}"]
+        for m in measures:
+            total, count, top = _quote(m), _quote(m + "__n"), _quote(m + "__max")
+            value_exprs += [f"TOTAL({_quote(m)})", f"COUNT({_quote(m)})", f"MAX({_quote(m)})"]
+            updates += [
+                f"{total} = {total} + excluded.{total}",
+                f"{count} = {count} + excluded.{count}",
+                # scalar max() is NULL if either side is NULL
+                f"{top} = max(COALESCE({top}, excluded.{top}), COALESCE(excluded.{top}, {top}))",
+            ]
+        self._conn.execute(
+            f"INSERT INTO {_quote(f'_cube_{name}')} SELECT {', '.join(key_exprs + value_exprs)}"
+            f" FROM {_quote(name)} WHERE rowid > ? GROUP BY {', '.join(str(i + 1) for i in range(len(keys)))}"
+            f" ON CONFLICT ({', '.join(_quote(k) for k in keys)}) DO UPDATE SET {', '.join(updates)}",
+            (after_rowid,),
+        )
+
+    def _select_list(self, name, columns):
+        cols = self.columns(name) if columns is None else list(columns)
+        unknown = set(cols) - set(self.schemas[name])
+        if unknown:
+            raise KeyError(f"Unknown column(s) for {name}: {sorted(unknown)}")
+        return cols, ", ".join(_quote(c) for c in cols)
+
+    def read(self, name, columns=None, limit=None, newest=False):
+        """
+        Return table rows in insertion order, with only `columns` when given.
+        limit/newest=True reads just the last `limit` rows (like DataFrame.tail).
+        """
+        cols, select = self._select_list(name, columns)
+        sql = f"SELECT {select} FROM {_quote(name)} ORDER BY rowid {'DESC' if newest else 'ASC'}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._reading() as conn:
+            rows = conn.execute(sql).fetchall()
+        if newest:
+            rows.reverse()
+        return pd.DataFrame.from_records(rows, columns=cols)
+
+    def read_new(self, name, columns=None, after_rowid=0, limit=None, upto_rowid=None):
+        """
+        Return (rows inserted after `after_rowid`, highest rowid seen) for incremental reads.
+        limit caps the batch size; upto_rowid ignores rows written after a snapshot().
+        """
+        cols, select = self._select_list(name, columns)
+        sql = f"SELECT rowid, {select} FROM {_quote(name)} WHERE rowid > ?"
+        params = [after_rowid]
+        if upto_rowid is not None:
+            sql += " AND rowid <= ?"
+            params.append(upto_rowid)
+        sql += " ORDER BY rowid"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._reading() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=cols), after_rowid
+        return pd.DataFrame.from_records([r[1:] for r in rows], columns=cols), rows[-1][0]
+
+    def snapshot(self, name):
+        """(version, highest rowid) read together, so a chunked reader can stop at exactly that version."""
+        with self._reading() as conn:
+            version = conn.execute("SELECT version FROM _table_versions WHERE name = ?", (name,)).fetchone()[0]
+            last = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {_quote(name)}").fetchone()[0]
+        return version, last
+
+    def _where(self, name, filters):
+        clauses, params = [], []
+        for col, allowed in (filters or {}).items():
+            self._select_list(name, [col])
+            allowed = list(allowed)
+            if not allowed:
+                continue
+            clauses.append(f"{_quote(col)} IN ({', '.join('?' for _ in allowed)})")
+            params.extend(allowed)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, name, columns=None, filters=None, order_by=None, descending=False, order_values=None,
+              limit=None, offset=0):
+        """
+        One page of rows, filtered and sorted in SQL; returns (DataFrame, number of matching rows).
+        filters maps a column to its allowed values (an empty list means no filter). order_values
+        gives an explicit ranking for order_by (e.g. fiscal-year months); unranked values sort last.
+        Ties keep insertion order, so pages are stable.
+        """
+        cols, select = self._select_list(name, columns)
+        where, params = self._where(name, filters)
+        direction = "DESC" if descending else "ASC"
+        order, order_params = f"rowid {direction}", []
+        if order_by:
+            self._select_list(name, [order_by])
+            key = _quote(order_by)
+            if order_values:
+                ranks = " ".join(f"WHEN ? THEN {i}" for i in range(len(order_values)))
+                key = f"CASE {key} {ranks} ELSE {len(order_values)} END"
+                order_params = list(order_values)
+            order = f"{key} {direction}, rowid"
+        sql = f"SELECT {select} FROM {_quote(name)}{where} ORDER BY {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+        with self._reading() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM {_quote(name)}{where}", params).fetchone()[0]
+            rows = conn.execute(sql, params + order_params).fetchall()
+        return pd.DataFrame.from_records(rows, columns=cols), total
+
+    def distinct(self, name, column):
+        """Sorted non-null values of one column."""
+        self._select_list(name, [column])
+        with self._reading() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT {_quote(column)} FROM {_quote(name)} WHERE {_quote(column)} IS NOT NULL ORDER BY 1"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def moments(self, name, column, by, filters=None):
+        """
+        Row count, sum and sum of squares of a numeric column per combination of the `by` columns,
+        grouped in SQL over the table itself (the cube keeps no squares). Columns: by + rows, sum, sum_sq.
+        """
+        by = list(by)
+        self._select_list(name, by + [column])
+        where, params = self._where(name, filters)
+        value = _quote(column)
+        sql = (f"SELECT {', '.join(_quote(c) for c in by)}, COUNT(*), TOTAL({value}), TOTAL({value} * {value})"
+               f" FROM {_quote(name)}{where} GROUP BY {', '.join(str(i + 1) for i in range(len(by)))}")
+        with self._reading() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return pd.DataFrame.from_records(rows, columns=by + [ROW_COUNT, "sum", "sum_sq"])
+
+    def count(self, name):
+        with self._reading() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {_quote(name)}").fetchone()[0]
+
+    def version(self, name):
+        with self._reading() as conn:
+            return conn.execute("SELECT version FROM _table_versions WHERE name = ?", (name,)).fetchone()[0]
+
+    def versions(self):
+        """{table: version} for every table, read in one snapshot (also sees writes from other processes)."""
+        with self._reading() as conn:
+            rows = conn.execute("SELECT name, version FROM _table_versions").fetchall()
+        return {name: version for name, version in rows if name in self.schemas}
+
+    def changed_since(self, versions):
+        """{table: current version} for the tables written since `versions` (a previous versions() result)."""
+        return {name: v for name, v in self.versions().items() if versions.get(name) != v}
+
+    def wait_for_change(self, versions, timeout=None, poll=1.0):
+        """
+        Block until a table changes relative to `versions` or timeout seconds pass; returns changed_since().
+        Writes through this store wake waiters at once; writes by other processes are seen within `poll` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self.changed_since(versions)
+            if changed or self._closed:
+                return changed
+            wait = poll if deadline is None else min(poll, deadline - time.monotonic())
+            if wait <= 0:
+                return changed
+            with self._changed:
+                self._changed.wait(wait)
+
+    def append(self, name, df):
+        """
+        Insert the rows of df (missing schema columns become NULL); returns the number of rows written.
+        For KEYED_TABLES, rows whose ROW_KEY_COLUMN is already stored are skipped by the unique index.
+        """
+        if df is None or len(df) == 0:
+            return 0
+        cols = self.columns(name)
+        keyed = name in KEYED_TABLES and ROW_KEY_COLUMN in df.columns
+        if keyed:
+            cols = cols + [ROW_KEY_COLUMN]
+        frame = df.reindex(columns=cols)
+        values = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+        placeholders = ", ".join("?" for _ in cols)
+        sql = (f"INSERT {'OR IGNORE ' if keyed else ''}INTO {_quote(name)} "
+               f"({', '.join(_quote(c) for c in cols)}) VALUES ({placeholders})")
+        with self._writing() as conn:
+            last_rowid = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {_quote(name)}").fetchone()[0]
+            before = conn.total_changes
+            conn.executemany(sql, values)
+            written = conn.total_changes - before
+            if written:
+                self._update_cube(name, last_rowid)
+                conn.execute("UPDATE _table_versions SET version = version + 1 WHERE name = ?", (name,))
+        return written
+
+    def _cube_where(self, name, filters):
+        clauses, params = [], []
+        keys = self.cube_keys(name)
+        for col, allowed in (filters or {}).items():
+            if col not in keys:
+                raise KeyError(f"{col} is not a cube key of {name}: {keys}")
+            # nulls are stored in the cube as FY 0 / ''
+            allowed = [(0 if col == "FY" else "") if v is None else v for v in allowed]
+            if allowed:
+                clauses.append(f"{_quote(col)} IN ({', '.join('?' for _ in allowed)})")
+                params.extend(allowed)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def cube(self, name, measures=(), by=(), filters=None):
+        """
+        Sums of `measures` (plus the row count in ROW_COUNT) per combination of the `by` cube keys,
+        over the cube cells matching filters ({cube key: allowed values}). Never touches the table itself.
+        """
+        by = list(by)
+        where, params = self._cube_where(name, filters)
+        select = [_quote(k) for k in by] + [f"SUM({ROW_COUNT})"] + [f"TOTAL({_quote(m)})" for m in measures]
+        sql = f"SELECT {', '.join(select)} FROM {_quote(f'_cube_{name}')}{where}"
+        if by:
+            sql += f" GROUP BY {', '.join(_quote(k) for k in by)} ORDER BY {', '.join(_quote(k) for k in by)}"
+        with self._reading() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        frame = pd.DataFrame.from_records(rows, columns=by + [ROW_COUNT] + list(measures))
+        frame[ROW_COUNT] = frame[ROW_COUNT].fillna(0).astype("int64")
+        return frame[frame[ROW_COUNT] > 0].reset_index(drop=True)
+
+    def aggregate(self, name, measure, how="sum", filters=None):
+        """One KPI from the cube: how is "sum", "count" (non-null values), "mean" or "max"; None when there is no value."""
+        where, params = self._cube_where(name, filters)
+        m = _quote(measure)
+        expr = {
+            "sum": f"TOTAL({m})",
+            "count": f"TOTAL({_quote(measure + '__n')})",
+            "mean": f"TOTAL({m}) / NULLIF(TOTAL({_quote(measure + '__n')}), 0)",
+            "max": f"MAX({_quote(measure + '__max')})",
+        }[how] if measure != ROW_COUNT else f"TOTAL({ROW_COUNT})"
+        with self._reading() as conn:
+            return conn.execute(f"SELECT {expr} FROM {_quote(f'_cube_{name}')}{where}", params).fetchone()[0]
+
+    def partitions(self):
+        """Distinct (FY, Entity, Site) combinations holding data in any table; unset dimensions come back as 0 / ''."""
+        dims = ", ".join(_quote(d) for d in DIMENSION_COLUMNS)
+        sql = " UNION ".join(f"SELECT {dims} FROM {_quote(f'_cube_{name}')} WHERE {ROW_COUNT} > 0" for name in self.schemas)
+        with self._reading() as conn:
+            rows = conn.execute(sql).fetchall()
+        return pd.DataFrame.from_records(rows, columns=list(DIMENSION_COLUMNS))
+
+    def file_ingested(self, file_key):
+        """Rows recorded for an already ingested upload, or None if it is new."""
+        with self._reading() as conn:
+            row = conn.execute("SELECT rows FROM _ingested_files WHERE file_key = ?", (file_key,)).fetchone()
+        return None if row is None else row[0]
+
+    def record_file(self, file_key, name, rows):
+        with self._writing() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO _ingested_files VALUES (?, ?, ?, datetime('now'))", (file_key, name, rows)
+            )
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            self._conn.close()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._changed:
+            self._changed.notify_all()
+
+class Table:
+    """
+    Append buffer over one stored table.
+
+    append()/extend() only queue rows; they are written in one batch on flush(),
+    and a DataFrame is materialized only when a page calls frame(). Materialized
+    frames are kept per column selection and extended with just the rows written
+    since the previous read, so N adds no longer cost N full-table copies.
+    Frames returned by frame() are shared and must be treated as read-only.
+
+    A Table is shared by all sessions: the queue and frame cache have one lock,
+    and flushes of this table are serialized by another, held while the rows are
+    written, so reads never wait behind a write that is in progress.
+    """
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+        self._pending = []
+        self._frames = {}   # column tuple -> (last rowid, DataFrame)
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+
+    def append(self, row):
+        with self._lock:
+            self._pending.append(dict(row))
+
+    def extend(self, rows):
+        """Queue many rows (a DataFrame or an iterable of dicts)."""
+        chunk = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(list(rows))
+        if len(chunk):
+            with self._lock:
+                self._pending.append(chunk)
+
+    def flush(self):
+        """Write queued rows; consecutive dict rows go out as a single batch. Rows that fail to write are re-queued."""
+        if not self._pending:   # nothing queued: don't wait behind another session's flush
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, []
+            written, rows = 0, []
+            for i, item in enumerate(pending + [None]):
+                if isinstance(item, dict):
+                    rows.append(item)
+                    continue
+                try:
+                    if rows:
+                        written += self.store.append(self.name, pd.DataFrame(rows))
+                        rows = []
+                    if item is not None:
+                        written += self.store.append(self.name, item)
+                except BaseException:
+                    with self._lock:
+                        self._pending[:0] = rows + pending[i:]
+                    raise
+            return written
+
+    def frame(self, columns=None):
+        key = tuple(columns) if columns else tuple(self.store.columns(self.name))
+        self.flush()
+        with self._lock:
+            last_rowid, cached = self._frames.get(key, (0, None))
+        # the read runs unlocked so appends and other readers aren't held up by it
+        new_rows, last_rowid = self.store.read_new(self.name, key, last_rowid)
+        if cached is None:
+            cached = new_rows
+        elif len(new_rows):
+            cached = pd.concat([cached, new_rows], ignore_index=True)
+        with self._lock:
+            # a concurrent read may have cached a later snapshot meanwhile; keep the newest
+            latest = self._frames.get(key)
+            if latest is not None and latest[0] >= last_rowid:
+                return latest[1]
+            self._frames[key] = (last_rowid, cached)
+            return cached
+
+    def query(self, **kwargs):
+        """TableStore.query over this table, after writing queued rows."""
+        self.flush()
+        return self.store.query(self.name, **kwargs)
+
+    def distinct(self, column):
+        self.flush()
+        return self.store.distinct(self.name, column)
+
+    def cube(self, measures=(), by=(), filters=None):
+        self.flush()
+        return self.store.cube(self.name, measures, by, filters)
+
+    def aggregate(self, measure, how="sum", filters=None):
+        self.flush()
+        return self.store.aggregate(self.name, measure, how, filters)
+
+    def tail(self, n):
+        self.flush()
+        return self.store.read(self.name, limit=n, newest=True)
+
+    def __len__(self):
+        with self._lock:
+            return self.store.count(self.name) + sum(1 if isinstance(i, dict) else len(i) for i in self._pending)
+
+    @property
+    def version(self):
+        self.flush()
+        return self.store.version(self.name)
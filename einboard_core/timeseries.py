@@ -0,0 +1,117 @@
+"""
+Monthly time series read from the table cubes, indexed by real month-start timestamps.
+
+Every row carries its fiscal year (FY) and FY month, and each table cube
+already holds one aggregate per (FY, Month, ...) cell, i.e. a precomputed
+monthly layout. monthly() turns those cells into a complete month-by-month
+frame (months without data are 0), and quarterly / annual figures are
+resampled from it on fiscal boundaries (quarters and years starting in
+April). Year-over-year, rolling-12-month and intensity views work on these
+aggregates only, never on table rows. Rows without a month or FY can't be
+placed in time; monthly() reports how many there are.
+"""
+import numpy as np
+import pandas as pd
+
+from .catalog import months
+from .storage import ROW_COUNT
+
+# view frequency -> pandas offset (fiscal quarters and years start in April)
+FREQUENCIES = {"Monthly": "MS", "Quarterly": "QS-APR", "Annual": "YS-APR"}
+PERIODS_PER_YEAR = {"Monthly": 12, "Quarterly": 4, "Annual": 1}
+TOTAL = "Total"
+
+# dashboard metric -> (table, measure, cube key it is broken down by, scale)
+METRICS = {
+    "GHG emissions (tCO2e)": ("entries", "Emissions_kgCO2e", "Scope", 0.001),
+    "Renewable energy (kWh)": ("renewable_entries", "Energy_kWh", "Source", 1.0),
+    "Water withdrawal (m³)": ("water_data", "Quantity_m3", "Source", 1.0),
+    "Waste generated (kg)": ("waste_data", "Quantity_kg", "Waste_Type", 1.0),
+}
+# intensity denominators, one column per unit
+PRODUCTION = "Production"
+PRODUCTION_SOURCE = ("production_data", "Quantity", "Unit", 1.0)
+
+def month_starts(fy, month):
+    """Month-start timestamps for FY start years and FY month names ("Apr".."Mar"); NaT where either is unset."""
+    position = pd.Series(np.asarray(month, dtype=object)).map({m: i for i, m in enumerate(months)})
+    fy = pd.to_numeric(pd.Series(np.asarray(fy, dtype=object)), errors="coerce")
+    fy = fy.where(fy > 0)
+    # Apr..Dec fall in the FY start year, Jan..Mar in the next
+    return pd.to_datetime(pd.DataFrame({"year": fy + (position >= 9), "month": (position + 3) % 12 + 1, "day": 1}),
+                          errors="coerce")
+
+def period_label(timestamps, freq):
+    """Display labels: "Apr 2024", "FY2024-25 Q1" or "FY2024-25"."""
+    index = pd.DatetimeIndex(timestamps)
+    if freq == "Monthly":
+        return list(index.strftime("%b %Y"))
+    fy = index.year - (index.month < 4)
+    labels = [f"FY{y}-{(y + 1) % 100:02d}" for y in fy]
+    if freq == "Quarterly":
+        labels = [f"{label} Q{(m - 4) % 12 // 3 + 1}" for label, m in zip(labels, index.month)]
+    return labels
+
+def monthly(store, name, measure, by=None, filters=None, scale=1.0):
+    """
+    Monthly sums of a measure from the cube of `name`, as (frame, undated rows). The frame is indexed by
+    month start with one column per value of the cube key `by` (a single TOTAL column without one), and
+    every month between the first and the last is present. scale converts units (e.g. 0.001 for kg -> t).
+    """
+    cells = store.cube(name, [measure], by=["FY","Month"] + ([by] if by else []), filters=filters)
+    cells["Period"] = month_starts(cells["FY"], cells["Month"]).to_numpy()
+    dated = cells["Period"].notna()
+    undated = int(cells.loc[~dated, ROW_COUNT].sum())
+    cells = cells[dated]
+    if cells.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="Period"), dtype=float), undated
+    if by:
+        cells[by] = cells[by].replace("", "Unspecified")
+        frame = cells.pivot_table(index="Period", columns=by, values=measure, aggfunc="sum", fill_value=0.0)
+        frame.columns = list(frame.columns)
+    else:
+        frame = cells.groupby("Period")[[measure]].sum().set_axis([TOTAL], axis=1)
+    return frame.asfreq("MS", fill_value=0.0) * scale, undated
+
+def resample(frame, freq):
+    """A monthly() frame summed per Monthly / Quarterly / Annual (fiscal) period."""
+    return frame if freq == "Monthly" else frame.resample(FREQUENCIES[freq]).sum()
+
+def year_over_year(frame, freq):
+    """
+    Each period's total next to the same period a year earlier, as a frame indexed by period start with
+    Value, Previous, Change and Change_pct (NaN where there is no earlier year or it was 0).
+    """
+    value = resample(frame, freq).sum(axis=1)
+    # the index has no gaps, so a year back is a fixed number of periods
+    previous = value.shift(PERIODS_PER_YEAR[freq])
+    change = value - previous
+    return pd.DataFrame({
+        "Value": value, "Previous": previous, "Change": change,
+        "Change_pct": change / previous.where(previous != 0) * 100,
+    })
+
+def rolling_12(frame):
+    """Trailing twelve-month sums per column, from the twelfth month of data on."""
+    return frame.rolling(12, min_periods=12).sum().dropna(how="all")
+
+def intensity(frame, production, freq):
+    """
+    Totals of a monthly() frame per unit of production (another monthly() frame, summed over its columns)
+    for each period; NaN where no production was recorded in the period.
+    """
+    value = resample(frame, freq).sum(axis=1)
+    output = resample(production, freq).sum(axis=1) if len(production.columns) else pd.Series(dtype=float)
+    value, output = value.align(output, join="left")
+    return pd.DataFrame({"Value": value, "Production": output, "Intensity": value / output.where(output > 0)})
+
+def monthly_metrics(store, filters=None):
+    """
+    {metric label: monthly() result} for METRICS plus PRODUCTION. An FY filter is ignored, since
+    year-over-year and rolling views need the earlier years too.
+    """
+    filters = {dim: values for dim, values in (filters or {}).items() if dim != "FY"}
+    series = {label: monthly(store, name, measure, by, filters, scale) for label, (name, measure, by, scale) in METRICS.items()}
+    name, measure, by, scale = PRODUCTION_SOURCE
+    series[PRODUCTION] = monthly(store, name, measure, by, filters, scale)
+    return series
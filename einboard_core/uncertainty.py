@@ -0,0 +1,121 @@
+"""
+Monte Carlo uncertainty of the GHG totals, for the ranges CDP asks for.
+
+Every emission factor gets a mean-one lognormal multiplier and every entry's
+quantity a normal error, both sized by a 95% half-width (±5% for metered
+fuel, ±50% for rough Scope 3 proxies, ...). A factor draw is shared by all
+entries using that factor, so its error doesn't average out over many rows;
+quantity errors are independent per entry.
+
+Entries are grouped in SQL per (scope, activity, sub-activity, specific item,
+unit), which fixes the factor, keeping each group's kg sum and sum of squares.
+Within a group the independent quantity errors add up to one normal with the
+exact variance (u / 1.96)^2 * sum of squares, so 10,000 draws over the whole
+table are a few (groups x draws) array operations rather than a loop over rows.
+"""
+import numpy as np
+import pandas as pd
+
+from .engine import resolve_factor
+from .factors import emission_factors
+
+DEFAULT_DRAWS = 10_000
+CONFIDENCE = 0.95
+Z95 = 1.959964
+
+# 95% half-width of a factor, relative (0.3 = ±30%), by engine factor key
+FACTOR_UNCERTAINTY = {
+    "Diesel": 0.05, "Petrol": 0.05, "LPG": 0.05, "CNG": 0.05, "Coal": 0.10,
+    "Electricity": 0.10, "Product use kWh": 0.10,
+    "Cement": 0.30, "Steel": 0.30, "Textile": 0.50, "Chemicals": 0.50,
+    "Cardboard": 0.30, "Plastics": 0.30, "Glass": 0.30, "Paper": 0.30,
+    "Air Travel (domestic average)": 0.30, "Train per km": 0.30, "Taxi per km": 0.30,
+    "TwoWheeler per km": 0.30, "Car per km": 0.30,
+    "Landfill per kg": 0.50, "Recycling per kg": 0.50, "Composting per kg": 0.50,
+}
+LIBRARY_FACTOR_UNCERTAINTY = 0.30   # emission_factors.csv activity rows
+DEFAULT_FACTOR_UNCERTAINTY = 0.50
+# activity data: metered Scope 1/2 quantities vs estimated Scope 3 ones
+QUANTITY_UNCERTAINTY = {"Scope 1": 0.05, "Scope 2": 0.05, "Scope 3": 0.20}
+DEFAULT_QUANTITY_UNCERTAINTY = 0.20
+
+GROUP_COLUMNS = ["Scope","Activity","Sub-Activity","Specific Item","Unit"]
+CHUNK_GROUPS = 256      # groups drawn at a time, bounding memory at CHUNK_GROUPS x draws
+ALL = "All"
+
+def factor_uncertainty(factor_key):
+    if factor_key in FACTOR_UNCERTAINTY:
+        return FACTOR_UNCERTAINTY[factor_key]
+    # keys outside the built-in table come from emission_factors.csv
+    return DEFAULT_FACTOR_UNCERTAINTY if factor_key in emission_factors else LIBRARY_FACTOR_UNCERTAINTY
+
+def emission_groups(store, filters=None):
+    """
+    Entries grouped on GROUP_COLUMNS with rows, sum / sum_sq of Emissions_kgCO2e, the Factor key
+    and the factor_u / quantity_u half-widths. Groups without emissions are dropped.
+    """
+    groups = store.moments("entries", "Emissions_kgCO2e", GROUP_COLUMNS, filters)
+    groups = groups[groups["sum"] != 0].reset_index(drop=True)
+    for col in GROUP_COLUMNS:
+        groups[col] = groups[col].fillna("")
+    groups["Factor"] = [resolve_factor(scope, sub, specific, unit).factor_key or "" for scope, sub, specific, unit
+                        in zip(groups["Scope"], groups["Sub-Activity"], groups["Specific Item"], groups["Unit"])]
+    groups["factor_u"] = groups["Factor"].map(factor_uncertainty)
+    groups["quantity_u"] = groups["Scope"].map(QUANTITY_UNCERTAINTY).fillna(DEFAULT_QUANTITY_UNCERTAINTY)
+    return groups
+
+def simulate(groups, draws=DEFAULT_DRAWS, seed=0):
+    """
+    Simulated kg totals per (Scope, Activity) cell: returns (cells, samples). cells has Scope, Category
+    and the reported Central_kg; samples is a (cells, draws) array. The seed is fixed by default so the
+    same data always gives the same intervals.
+    """
+    rng = np.random.default_rng(seed)
+    groups = groups.sort_values(["Scope","Activity"], kind="stable")
+    factor_codes, factors = pd.factorize(groups["Factor"])
+    sigma = np.log1p(groups.groupby(factor_codes, sort=True)["factor_u"].first().to_numpy()) / Z95
+    multipliers = np.exp(sigma[:, None] * rng.standard_normal((len(factors), draws)) - sigma[:, None] ** 2 / 2)
+
+    cell_codes, cells = pd.MultiIndex.from_frame(groups[["Scope","Activity"]]).factorize()
+    mean = groups["sum"].to_numpy(dtype=float)
+    sd = groups["quantity_u"].to_numpy(dtype=float) / Z95 * np.sqrt(groups["sum_sq"].to_numpy(dtype=float))
+    samples = np.zeros((len(cells), draws))
+    for start in range(0, len(groups), CHUNK_GROUPS):
+        part = slice(start, start + CHUNK_GROUPS)
+        totals = multipliers[factor_codes[part]] * (mean[part, None] + sd[part, None] * rng.standard_normal((len(mean[part]), draws)))
+        # groups are sorted by cell, so each cell is one run of rows
+        codes = cell_codes[part]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        samples[codes[starts]] += np.add.reduceat(totals, starts, axis=0)
+    cells = cells.to_frame(index=False, name=["Scope","Category"])
+    cells["Central_kg"] = np.bincount(cell_codes, mean, minlength=len(cells))
+    return cells, samples
+
+def emission_intervals(store, filters=None, draws=DEFAULT_DRAWS, confidence=CONFIDENCE, seed=0):
+    """
+    Confidence intervals in tCO2e per scope and category, per scope (Category "All") and overall
+    (Scope and Category "All"). Columns: Scope, Category, Central_t (the reported total), Mean_t,
+    Lower_t, Upper_t and Range_pct (half the interval as a % of Central_t).
+    """
+    columns = ["Scope","Category","Central_t","Mean_t","Lower_t","Upper_t","Range_pct"]
+    groups = emission_groups(store, filters)
+    if groups.empty:
+        return pd.DataFrame(columns=columns)
+    cells, samples = simulate(groups, draws, seed)
+    central = cells.pop("Central_kg").to_numpy()
+
+    scopes, scope_codes = np.unique(cells["Scope"], return_inverse=True)
+    scope_samples = np.zeros((len(scopes), draws))
+    np.add.at(scope_samples, scope_codes, samples)
+    labels = pd.concat([
+        cells,
+        pd.DataFrame({"Scope": scopes, "Category": ALL}),
+        pd.DataFrame({"Scope": [ALL], "Category": [ALL]}),
+    ], ignore_index=True)
+    stacked = np.vstack([samples, scope_samples, samples.sum(axis=0, keepdims=True)]) / 1000
+    central_t = np.concatenate([central, np.bincount(scope_codes, central), [central.sum()]]) / 1000
+    tail = (1 - confidence) / 2
+    lower, upper = np.quantile(stacked, [tail, 1 - tail], axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread = np.where(central_t != 0, (upper - lower) / 2 / np.abs(central_t) * 100, np.nan)
+    return labels.assign(Central_t=central_t, Mean_t=stacked.mean(axis=1), Lower_t=lower, Upper_t=upper, Range_pct=spread)[columns]
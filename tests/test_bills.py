@@ -0,0 +1,11 @@
+from einboard_core.bills import BillExtract, bill_rows
+
+def extract(bill_date, month):
+    return BillExtract("h", 300.0, None, None, bill_date, month, None)
+
+def test_bill_rows_take_the_bill_dates_fiscal_year():
+    assert [r["FY"] for r in bill_rows(extract("2023-03-15", "Mar"))] == [2022]
+    assert [r["FY"] for r in bill_rows(extract("2023-04-01", "Apr"))] == [2023]
+
+def test_undated_bill_rows_leave_fy_unset():
+    assert [r["FY"] for r in bill_rows(extract(None, None))] == [None]
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from einboard_core import engine
+from einboard_core.catalog import scope_activities, units_dict
+from einboard_core.engine import calculate_emissions, calculate_emissions_batch
+
+EXTRA_UNITS = ["", "kWh", "Number of flights", "km traveled", "kg / tonnes"]
+
+@pytest.fixture
+def builtin_factors(monkeypatch):
+    """Factors from the built-in table only: no emission_factors.csv fallback in either path."""
+    monkeypatch.setattr(engine, "factor_library", None)
+    engine._resolve_uncached.cache_clear()
+    monkeypatch.setattr(engine, "FACTOR_TABLE", engine._build_factor_table())
+    yield
+    engine._resolve_uncached.cache_clear()
+
+def catalogue_rows():
+    units = sorted(set(units_dict.values()) | set(EXTRA_UNITS))
+    rows = []
+    for scope, activities in scope_activities.items():
+        for activity, subs in activities.items():
+            for sub_activity, detail in subs.items():
+                for specific in [""] + (detail if isinstance(detail, list) else []):
+                    for unit in units:
+                        rows.append({"Scope": scope, "Activity": activity, "Sub-Activity": sub_activity,
+                                     "Specific Item": specific, "Unit": unit})
+    df = pd.DataFrame(rows)
+    df["Quantity"] = np.random.default_rng(0).uniform(0, 1000, len(df)).round(3)
+    return df
+
+def assert_batch_matches_scalar(df):
+    emissions, missing = calculate_emissions_batch(df)
+    for i, row in enumerate(df.itertuples(index=False)):
+        expected, expected_missing = calculate_emissions(row.Scope, row.Activity, row[2], row[3], row.Quantity, row.Unit)
+        assert missing.iloc[i] == expected_missing, row
+        assert emissions.iloc[i] == expected, row
+
+def test_batch_matches_scalar_over_catalogue(builtin_factors):
+    df = catalogue_rows()
+    assert_batch_matches_scalar(df)
+    missing = calculate_emissions_batch(df)[1]
+    assert (~missing).any() and missing.any()
+
+def library_rows(column):
+    """Free-text Scope 3 rows, one per emission_factors.csv record, that only the library fallback resolves."""
+    if engine.factor_library is None:
+        pytest.skip("emission_factors.csv not available")
+    rows = [{"Scope": "Scope 3", "Activity": "Other", "Sub-Activity": "Other", "Specific Item": "",
+             "Unit": r.unit, "Quantity": 10.0, column: r.activity} for r in engine.factor_library.records]
+    return pd.DataFrame(rows)
+
+def test_batch_matches_scalar_with_factor_library():
+    library = library_rows("Specific Item")
+    assert_batch_matches_scalar(pd.concat([catalogue_rows(), library], ignore_index=True))
+    assert (~calculate_emissions_batch(library)[1]).any()
+
+@pytest.mark.parametrize("blank", [None, np.nan])
+def test_missing_specific_item_is_blank_in_both_paths(blank):
+    df = pd.concat([catalogue_rows(), library_rows("Sub-Activity")], ignore_index=True)
+    df["Specific Item"] = pd.Series([blank] * len(df), dtype=object)
+    assert_batch_matches_scalar(df)
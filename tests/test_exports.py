@@ -0,0 +1,25 @@
+import os
+
+import pandas as pd
+
+from einboard_core import exports
+from einboard_core.storage import TableStore
+
+def test_recreated_database_gets_a_fresh_export(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_DIR", str(tmp_path / "exports"))
+    db = str(tmp_path / "t.sqlite")
+    store = TableStore(db)
+    store.append("risk_data", pd.DataFrame([{"Risk": "Flood"}, {"Risk": "Heat"}]))
+    old = exports.export_file(store, "risk_data", "CSV")
+    store.close()
+    for name in os.listdir(tmp_path):
+        if name.startswith("t.sqlite"):
+            os.remove(tmp_path / name)
+
+    store = TableStore(db)
+    store.append("risk_data", pd.DataFrame([{"Risk": "Drought"}]))
+    new = exports.export_file(store, "risk_data", "CSV")
+    store.close()
+    # same table version, new database: not the old file
+    assert new != old and not os.path.exists(old)
+    assert pd.read_csv(new)["Risk"].tolist() == ["Drought"]
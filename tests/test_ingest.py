@@ -0,0 +1,34 @@
+import io
+
+import pandas as pd
+
+from einboard_core.ingest import parse_month, read_upload_chunks
+
+HEADER = "Scope,Activity,Sub-Activity,Quantity,Unit,Month,FY\n"
+
+def read_csv(body):
+    unparsed = {}
+    chunks = list(read_upload_chunks(io.BytesIO((HEADER + body).encode()), "upload.csv", unparsed=unparsed))
+    return pd.concat(chunks, ignore_index=True), unparsed
+
+def test_parse_month_forms():
+    assert parse_month("April") == ("Apr", None)
+    assert parse_month("2024-04") == ("Apr", 2024)
+    assert parse_month("04/2024") == ("Apr", 2024)
+    assert parse_month("15/03/2024") == ("Mar", 2023)
+    assert parse_month("Jan-25") == ("Jan", 2024)
+    assert parse_month("45383") == ("Apr", 2024)     # Excel serial of 1 Apr 2024
+    assert parse_month("Q1") == (None, None)
+
+def test_months_normalized_and_fy_filled_from_dates():
+    df, unparsed = read_csv(
+        "Scope 1,Stationary Combustion,Diesel Generator,10,Liters,2024-05,\n"
+        "Scope 1,Stationary Combustion,Diesel Generator,10,Liters,2024-05,2022\n"
+        "Scope 1,Stationary Combustion,Diesel Generator,10,Liters,june,\n"
+        "Scope 1,Stationary Combustion,Diesel Generator,10,Liters,,\n"
+        "Scope 1,Stationary Combustion,Diesel Generator,10,Liters,sometime,\n"
+    )
+    assert df["Month"].tolist() == ["May", "May", "Jun", None, None]
+    # an explicit FY is kept; a dated Month fills only a blank one
+    assert df["FY"].tolist() == [2024, 2022, pd.NA, pd.NA, pd.NA]
+    assert unparsed == {"sometime": 1}
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from einboard_core import scenarios
+from einboard_core.scenarios import lever_totals, macc
+
+COSTS = {"LPG": 75.0, "CNG": 80.0, "Electricity": 8.0}
+
+@pytest.fixture
+def priced(monkeypatch):
+    monkeypatch.setattr(scenarios, "unit_costs", lambda: dict(COSTS))
+    monkeypatch.setitem(scenarios.emission_factors, "LPG", 1.51)    # per litre
+    monkeypatch.setitem(scenarios.emission_factors, "CNG", 2.02)    # per m³
+    monkeypatch.setitem(scenarios.emission_factors, "Electricity", 0.82)
+
+def matrix(*rows):
+    return pd.DataFrame(rows, columns=["Scope","Activity","Sub-Activity","Unit","Quantity","Emissions_kgCO2e"])
+
+def test_lpg_boiler_switch_to_cng_converts_litres_and_m3_to_kg(priced):
+    totals = lever_totals(matrix(("Scope 1", "Stationary Combustion", "LPG Boiler", "Liters", 1000.0, 1510.0)), "CNG")
+    lpg_kg = 1000 * 0.51
+    cng_kg = lpg_kg * 46.1 / 48                 # same energy
+    assert totals.switch_kg == pytest.approx(1510.0)
+    assert totals.switch_target_kg == pytest.approx(cng_kg * 2.02 / 0.72)
+    assert totals.switch_cost_delta == pytest.approx(cng_kg * 80 - lpg_kg * 75)
+
+    curve = macc(totals, {"fuel_switch_share": 1.0}, 2024)
+    assert list(curve["Lever"]) == ["Stationary combustion fuel switch"]
+    abatement_t = (1510.0 - cng_kg * 2.02 / 0.72) / 1000
+    assert curve.loc[0, "Abatement_t"] == pytest.approx(abatement_t)
+    assert curve.loc[0, "Cost_per_t"] == pytest.approx((cng_kg * 80 - lpg_kg * 75) / abatement_t)
+
+def test_cng_fleet_electrification_prices_m3_as_kg(priced):
+    totals = lever_totals(matrix(("Scope 1", "Mobile Combustion", "CNG Vehicle", "m³", 500.0, 1010.0)), "CNG")
+    cng_kg = 500 * 0.72
+    assert totals.fleet_kg == pytest.approx(1010.0)
+    assert totals.fleet_fuel_kwh == pytest.approx(cng_kg * 48 / 3.6)
+    assert totals.fleet_fuel_cost == pytest.approx(cng_kg * 80)
+
+    curve = macc(totals, {"ev_share": 1.0, "ev_kwh_per_fuel_kwh": 0.2}, 2024)
+    ev_kwh = cng_kg * 48 / 3.6 * 0.2
+    assert list(curve["Lever"]) == ["Fleet electrification"]
+    assert curve.loc[0, "Abatement_t"] == pytest.approx((1010.0 - ev_kwh * 0.82) / 1000)
+    assert curve.loc[0, "Cost_INR"] == pytest.approx(ev_kwh * 8 - cng_kg * 80)
+
+def test_fuel_in_unconvertible_unit_is_left_out(priced):
+    totals = lever_totals(matrix(("Scope 1", "Stationary Combustion", "LPG Boiler", "Tonnes", 1.0, 1510.0)), "CNG")
+    assert totals.switch_kg == 0.0
+    assert totals.switch_cost_delta == 0.0